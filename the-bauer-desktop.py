@@ -0,0 +1,1358 @@
+# desktop tooling for the-bauer.py, see loadDesktop there: the script loads this file
+# into its own globals, so everything here runs on the script's classes and settings.
+# python the-bauer.py --bench / --check / --montecarlo RUNS / ..
+
+# glyphs the oxocard script leaves out
+FONT.update({
+    ",": "00a060",
+    "-": "0808080808",
+    "0": "3e5149453e",
+    "1": "00427f4000",
+    "2": "4261514946",
+    "3": "2141454b31",
+    "4": "1814127f10",
+    "5": "2745454539",
+    "6": "3c4a494930",
+    "7": "0171090503",
+    "8": "3649494936",
+    "9": "064949291e",
+    "C": "3e41414122",
+    "D": "7f4141221c",
+    "F": "7f09090901",
+    "I": "00417f4100",
+    "K": "7f08142241",
+    "L": "7f40404040",
+    "N": "7f0408107f",
+    "O": "3e4141413e",
+    "P": "7f09090906",
+    "S": "4649494931",
+    "V": "1f2040201f",
+    "Y": "0708700807",
+    "d": "384444487f",
+    "g": "0c5252523e",
+    "n": "7c08040478",
+    "s": "4854545420",
+    "y": "0c5050503c"
+})
+
+# reads a session log back record by record
+class SessionReader():
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        if self.data[:len(LOG_MAGIC)] != LOG_MAGIC:
+            raise ValueError("not a session log: " + path)
+        version, self.seedValue = struct.unpack_from("<BI", self.data, len(LOG_MAGIC))
+        if version != LOG_VERSION:
+            raise ValueError("unsupported session log version " + str(version))
+        self.offset = len(LOG_MAGIC) + struct.calcsize("<BI")
+
+    def isFinished(self):
+        return self.offset >= len(self.data)
+
+    def readTag(self):
+        tag = self.data[self.offset]
+        self.offset = self.offset + 1
+        return tag
+
+    # next record must be of the given kind
+    def readValue(self, kind):
+        tag = self.readTag()
+        if tag & 0xf0 != kind:
+            raise ValueError("replay diverged at byte " + str(self.offset - 1))
+        valueFormat = LOG_FORMATS[tag & 0x0f]
+        value = struct.unpack_from(valueFormat, self.data, self.offset)[0]
+        self.offset = self.offset + struct.calcsize(valueFormat)
+        return value
+
+class ReplayAccelerometer():
+    def __init__(self, reader):
+        self.reader = reader
+
+    def getRoll(self):
+        if self.reader.isFinished():
+            return 0
+        return self.reader.readValue(LOG_ROLL)
+
+    def getPitch(self):
+        if self.reader.isFinished():
+            return 0
+        return self.reader.readValue(LOG_PITCH)
+
+class ReplayButton():
+    def __init__(self, reader):
+        self.reader = reader
+
+    def isPressed(self):
+        # end of the log ends the game
+        if self.reader.isFinished():
+            return True
+        tag = self.reader.readTag()
+        if tag != LOG_PRESSED and tag != LOG_RELEASED:
+            raise ValueError("replay diverged at byte " + str(self.reader.offset - 1))
+        return tag == LOG_PRESSED
+
+# replays a session log without display and without sleeping
+class ReplayDriver(HeadlessDriver):
+    def __init__(self, path):
+        HeadlessDriver.__init__(self)
+        self.reader = SessionReader(path)
+        seed(self.reader.seedValue)
+        self.ticks = 0
+
+    def getSensors(self, threshold):
+        return SensorService(ReplayAccelerometer(self.reader), ReplayButton(self.reader), threshold)
+
+    def sleep(self, seconds):
+        if not self.reader.isFinished() and self.reader.readTag() != LOG_TICK:
+            raise ValueError("replay diverged at byte " + str(self.reader.offset - 1))
+        self.ticks = self.ticks + 1
+
+# replay a recorded session unthrottled, returns ticks and seconds it took
+def replay(path):
+    driver = ReplayDriver(path)
+    sim = Bauer(Step.HELLO, 0, driver)
+    start = time.time()
+    while sim.play():
+        pass
+    return driver.ticks, time.time() - start
+
+# state streaming to mirror displays
+# message: <I length> <B kind> <B step> <I tick> payload
+# keyframe payload: <HH width height>, dots packed two per byte (even dots in the low
+# nibble), <H tractors> and per tractor <H slot> <II back front> <8h elements>
+# delta payload: <I changed> and per dot <H or I index> <B value>, <H tractors>
+# <H changed> and the changed tractors as in a keyframe
+STREAM_KEYFRAME = 0x01
+STREAM_DELTA = 0x02
+STREAM_HEADER = "<BBI"
+STREAM_TRACTOR = "<HII8h"
+# ticks between keyframes
+STREAM_KEYFRAME_EVERY = 100
+
+# dot index format for a field size
+def getStreamIndexFormat(size):
+    return "<H" if size <= 0x10000 else "<I"
+
+# sends the state of a game to subscribed connections (anything with sendall, e.g. a
+# socket): a keyframe first and every keyframeEvery ticks, deltas of the changes between
+class StatePublisher():
+    def __init__(self, keyframeEvery = STREAM_KEYFRAME_EVERY):
+        self.keyframeEvery = keyframeEvery
+        self.connections = []
+        # connections waiting for a keyframe
+        self.joining = []
+        self.ticks = 0
+        # state the subscribers have
+        self.dots = None
+        self.tracs = []
+        # statistics
+        self.keyframes = 0
+        self.deltas = 0
+        self.keyframeBytes = 0
+        self.deltaBytes = 0
+
+    def subscribe(self, connection):
+        self.connections.append(connection)
+        self.joining.append(connection)
+
+    def unsubscribe(self, connection):
+        if connection in self.connections:
+            self.connections.remove(connection)
+        if connection in self.joining:
+            self.joining.remove(connection)
+
+    # one message per tick, called by Bauer.update
+    def publish(self, bauer):
+        field = bauer.field
+        if self.dots is None or len(self.dots) != len(field.dots) or self.ticks % self.keyframeEvery == 0:
+            self.joining = []
+            self.send(self.connections, self.getKeyframe(bauer), True)
+        else:
+            delta = self.getDelta(bauer)
+            if len(self.joining) > 0:
+                joining = self.joining
+                self.joining = []
+                self.send(joining, self.getKeyframe(bauer), True)
+                self.send([c for c in self.connections if c not in joining], delta, False)
+            else:
+                self.send(self.connections, delta, False)
+        self.ticks = self.ticks + 1
+
+    def send(self, connections, message, keyframe):
+        message = struct.pack("<I", len(message)) + message
+        # a failed connection leaves self.connections while we go through it
+        for connection in list(connections):
+            try:
+                connection.sendall(message)
+            except OSError:
+                # mirror went away
+                self.unsubscribe(connection)
+        if keyframe:
+            self.keyframes = self.keyframes + 1
+            self.keyframeBytes = self.keyframeBytes + len(message)
+        else:
+            self.deltas = self.deltas + 1
+            self.deltaBytes = self.deltaBytes + len(message)
+
+    def getTractor(self, trac):
+        return (trac.colorBack, trac.colorFront, tuple(trac.elements))
+
+    def packTractor(self, slot, tractor):
+        return struct.pack(STREAM_TRACTOR, slot, tractor[0], tractor[1], *tractor[2])
+
+    def getKeyframe(self, bauer):
+        field = bauer.field
+        dots = field.dots
+        self.dots = bytearray(len(dots))
+        for i in range(len(dots)):
+            self.dots[i] = dots[i]
+        packed = bytearray(int((len(dots) + 1) / 2))
+        for i in range(len(dots)):
+            packed[i >> 1] = packed[i >> 1] | (self.dots[i] << ((i & 1) << 2))
+        self.tracs = [self.getTractor(trac) for trac in bauer.tracs]
+        message = [struct.pack(STREAM_HEADER, STREAM_KEYFRAME, bauer.step, self.ticks), struct.pack("<HH", field.width, field.height), bytes(packed), struct.pack("<H", len(self.tracs))]
+        for slot in range(len(self.tracs)):
+            message.append(self.packTractor(slot, self.tracs[slot]))
+        return b"".join(message)
+
+    # dots written since the last frame (the whole field if unknown) that differ from
+    # what was sent, and the tractors that moved
+    def getDelta(self, bauer):
+        field = bauer.field
+        dots = field.dots
+        candidates = range(len(dots)) if field.dirtyAll else sorted(field.dirty)
+        indexFormat = getStreamIndexFormat(len(dots))
+        changes = []
+        for i in candidates:
+            dot = dots[i]
+            if self.dots[i] != dot:
+                self.dots[i] = dot
+                changes.append(struct.pack(indexFormat, i) + bytes([dot]))
+        message = [struct.pack(STREAM_HEADER, STREAM_DELTA, bauer.step, self.ticks), struct.pack("<I", len(changes))]
+        message.extend(changes)
+        tracs = [self.getTractor(trac) for trac in bauer.tracs]
+        moved = []
+        for slot in range(len(tracs)):
+            if slot >= len(self.tracs) or self.tracs[slot] != tracs[slot]:
+                moved.append(self.packTractor(slot, tracs[slot]))
+        self.tracs = tracs
+        message.append(struct.pack("<HH", len(tracs), len(moved)))
+        message.extend(moved)
+        return b"".join(message)
+
+# rebuilds the state of a published game from its messages
+class StateSubscriber():
+    def __init__(self, connection = None):
+        self.connection = connection
+        self.buffer = b""
+        self.width = 0
+        self.height = 0
+        self.dots = None
+        # slot -> (back, front, elements)
+        self.tracs = []
+        self.step = Step.HELLO
+        self.tick = -1
+        # steps seen, [tick, step] per transition
+        self.transitions = []
+        self.frame = None
+
+    # read what the connection has without blocking, returns the messages applied
+    def receive(self):
+        if self.connection is not None:
+            self.connection.setblocking(False)
+            while True:
+                try:
+                    data = self.connection.recv(4096)
+                except OSError:
+                    break
+                if not data:
+                    break
+                self.buffer = self.buffer + data
+        return self.feed(b"")
+
+    # add received bytes, apply the complete messages
+    def feed(self, data):
+        self.buffer = self.buffer + data
+        applied = 0
+        while len(self.buffer) >= 4:
+            length = struct.unpack_from("<I", self.buffer)[0]
+            if len(self.buffer) < 4 + length:
+                break
+            self.apply(self.buffer[4:4 + length])
+            self.buffer = self.buffer[4 + length:]
+            applied = applied + 1
+        return applied
+
+    def apply(self, message):
+        kind, step, tick = struct.unpack_from(STREAM_HEADER, message)
+        offset = struct.calcsize(STREAM_HEADER)
+        if kind == STREAM_KEYFRAME:
+            self.width, self.height = struct.unpack_from("<HH", message, offset)
+            offset = offset + 4
+            size = self.width * self.height
+            packed = message[offset:offset + int((size + 1) / 2)]
+            offset = offset + len(packed)
+            self.dots = bytearray(size)
+            for i in range(size):
+                self.dots[i] = (packed[i >> 1] >> ((i & 1) << 2)) & 0x0f
+            self.tracs = []
+            offset = self.readTractors(message, offset + 2, struct.unpack_from("<H", message, offset)[0])
+        elif kind == STREAM_DELTA:
+            # deltas before the first keyframe can not be applied
+            if self.dots is None:
+                return
+            indexFormat = getStreamIndexFormat(len(self.dots))
+            entry = struct.calcsize(indexFormat)
+            changed = struct.unpack_from("<I", message, offset)[0]
+            offset = offset + 4
+            for c in range(changed):
+                i = struct.unpack_from(indexFormat, message, offset)[0]
+                self.dots[i] = message[offset + entry]
+                offset = offset + entry + 1
+            count, moved = struct.unpack_from("<HH", message, offset)
+            del self.tracs[count:]
+            offset = self.readTractors(message, offset + 4, moved)
+        else:
+            raise ValueError("unknown stream message " + str(kind))
+        if step != self.step or len(self.transitions) == 0:
+            self.transitions.append([tick, step])
+        self.step = step
+        self.tick = tick
+
+    def readTractors(self, message, offset, count):
+        size = struct.calcsize(STREAM_TRACTOR)
+        for t in range(count):
+            values = struct.unpack_from(STREAM_TRACTOR, message, offset)
+            slot = values[0]
+            while len(self.tracs) <= slot:
+                self.tracs.append(None)
+            self.tracs[slot] = (values[1], values[2], values[3:])
+            offset = offset + size
+        return offset
+
+    # frame like the renderer draws it, tractors over the dots
+    def getFrame(self):
+        if self.dots is None:
+            return None
+        size = len(self.dots)
+        if self.frame is None or len(self.frame) != size:
+            self.frame = array('I', [COL_BLACK]) * size
+        frame = self.frame
+        if self.step == Step.BYE:
+            for i in range(size):
+                frame[i] = COL_BLACK
+            return frame
+        colors = PALETTE.dots
+        for i in range(size):
+            frame[i] = colors[self.dots[i]]
+        # first tractor on top, like the occupancy
+        for slot in range(len(self.tracs) - 1, -1, -1):
+            back, front, elements = self.tracs[slot]
+            elementColors = PALETTE.getTracColors(back, front)
+            for el in range(Tractor.ELEMENTS):
+                x = elements[el << 1]
+                y = elements[(el << 1) + 1]
+                if x >= 0 and x < self.width and y >= 0 and y < self.height:
+                    frame[(y * self.width) + x] = elementColors[el]
+        return frame
+
+    # show the mirrored frame on a driver
+    def show(self, driver):
+        frame = self.getFrame()
+        if frame is not None:
+            driver.image(frame, self.width)
+            driver.repaint()
+
+# draw count values like randrange(n) in one batch
+# python's randrange takes 32 bit mersenne twister words shifted down to bit_length(n)
+# bits and rejects values >= n. numpy runs the same twister on a copy of the python
+# state, so the results and the following python draws are identical to calling
+# randrange count times
+def randranges(n, count):
+    loadNumpy()
+    if count == 0:
+        return np.zeros(0, dtype = np.int8)
+    bits = n.bit_length()
+    version, internal, gauss = random.getstate()
+    start = ("MT19937", np.array(internal[:-1], dtype = np.uint32), internal[-1])
+    rs = np.random.RandomState()
+    # expect an acceptance rate of n / 2^bits, draw more if it was not enough
+    total = int(count * (1 << bits) / n) + 64
+    while True:
+        rs.set_state(start)
+        values = rs.randint(0, 1 << 32, size = total, dtype = np.uint32) >> (32 - bits)
+        accepted = np.flatnonzero(values < n)
+        if len(accepted) >= count:
+            break
+        total = total * 2
+    # advance the python generator by the consumed words
+    rs.set_state(start)
+    rs.randint(0, 1 << 32, size = int(accepted[count - 1]) + 1, dtype = np.uint32)
+    state = rs.get_state()
+    random.setstate((version, tuple(int(k) for k in state[1]) + (int(state[2]),), gauss))
+    return values[accepted[:count]].astype(np.int8)
+
+# field with dots in a numpy array, same rules and random sequence as Field
+class ArrayField(Field):
+    __slots__ = ()
+
+    def __init__(self, width, height, colorMown, colorGrown):
+        if loadNumpy() is None:
+            raise ImportError("ArrayField needs numpy")
+        Field.__init__(self, width, height, colorMown, colorGrown)
+
+    def reset(self):
+        self.dots = randranges(self.MAX_MOWN, self.width * self.height)
+        self.dirty = {}
+        self.dirtyAll = True
+        self.recount()
+
+    def fill(self, dot):
+        self.dots[:] = dot
+        self.dirty = {}
+        self.dirtyAll = True
+        self.recount()
+
+    def recount(self):
+        self.growing = int(np.count_nonzero(self.dots < self.GROWN))
+        self.hayballs = int(np.count_nonzero(self.dots == self.HAYBALL))
+        self.standing = int(np.count_nonzero(self.dots > self.MAX_MOWN)) - self.hayballs
+        self.mownNear = self.getNearCounts(self.dots <= self.MAX_MOWN)
+        self.hayballsNear = self.getNearCounts(self.dots == self.HAYBALL)
+        if self.index is not None:
+            self.index.rebuild()
+
+    # 3x3 box sum of a boolean mask
+    def getNearCounts(self, mask):
+        grid = np.pad(mask.reshape(self.height, self.width).astype(np.int8), 1)
+        counts = np.zeros((self.height, self.width), dtype = np.int8)
+        for dY in range(3):
+            for dX in range(3):
+                counts = counts + grid[dY:dY + self.height, dX:dX + self.width]
+        return counts.ravel()
+
+    def areHayballs(self, indices):
+        indices = np.asarray(indices, dtype = np.intp)
+        self.hayballChecks = self.hayballChecks + len(indices)
+        return (self.hayballsNear[indices] == 0) & (self.mownNear[indices] >= 3)
+
+    def grow(self):
+        # grow all dots that are not yet growed
+        growing = np.flatnonzero(self.dots < self.GROWN)
+        old = self.dots[growing]
+        new = old + randranges(self.GROWTH, len(growing))
+        self.dots[growing] = new
+        changed = growing[new != old]
+        self.writes = self.writes + len(changed)
+        if len(changed) > FULL_FRAME_RATIO * len(self.dots):
+            self.dirtyAll = True
+        elif not self.dirtyAll:
+            dirty = self.dirty
+            for i, dot in zip(changed.tolist(), old[new != old].tolist()):
+                if i not in dirty:
+                    dirty[i] = dot
+        # growing dots are never hayballs
+        self.growing = self.growing - int(np.count_nonzero(new >= self.GROWN))
+        self.standing = self.standing + int(np.count_nonzero(new > self.MAX_MOWN)) - int(np.count_nonzero(old > self.MAX_MOWN))
+        # dots that grew out of mown
+        if np.any((old <= self.MAX_MOWN) & (new > self.MAX_MOWN)):
+            self.mownNear = self.getNearCounts(self.dots <= self.MAX_MOWN)
+        if self.index is not None:
+            moved = new != old
+            for i, before, after in zip(changed.tolist(), old[moved].tolist(), new[moved].tolist()):
+                self.index.update(i, before, after)
+        return True
+
+# values of a tiled field addressed by flat dot index
+class TiledPlane():
+    def __init__(self, field, buffer):
+        self.field = field
+        self.buffer = buffer
+
+    def __len__(self):
+        return self.field.width * self.field.height
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        return self.buffer[self.field.getOffset(i)]
+
+    def __setitem__(self, i, value):
+        self.buffer[self.field.getOffset(i)] = value
+
+# dots of a tiled field, chunks are filled on first access
+class TiledDots(TiledPlane):
+    def __getitem__(self, i):
+        offset = self.field.getOffset(i)
+        self.field.load(int(offset / self.field.chunkArea))
+        return self.buffer[offset]
+
+    def __setitem__(self, i, value):
+        offset = self.field.getOffset(i)
+        self.field.load(int(offset / self.field.chunkArea))
+        self.buffer[offset] = value
+
+# mown neighbour counts of a tiled field
+# stored as the number of not mown neighbours, so untouched chunks stay zero
+class TiledNearCounts(TiledPlane):
+    def __getitem__(self, i):
+        return self.field.getNearSize(i) - self.buffer[self.field.getOffset(i)]
+
+    def __setitem__(self, i, value):
+        self.buffer[self.field.getOffset(i)] = self.field.getNearSize(i) - value
+
+# field stored in chunks of a memory mapped (sparse) file for very large maps
+# untouched chunks are never written, so they cost neither memory nor disk
+class TiledField(Field):
+    __slots__ = ("path", "seedValue", "chunkSize", "chunkArea", "chunksX", "chunksY", "storage", "file", "loaded", "chunkGrowing")
+
+    def __init__(self, width, height, colorMown, colorGrown, path = None, seedValue = None):
+        self.path = path or FIELD_FILE
+        # chunk contents are drawn from their own generator when first touched
+        self.seedValue = seedValue if seedValue is not None else randrange(1 << 30)
+        self.chunkSize = CHUNK_SIZE
+        self.chunkArea = CHUNK_SIZE * CHUNK_SIZE
+        self.chunksX = int((width + CHUNK_SIZE - 1) / CHUNK_SIZE)
+        self.chunksY = int((height + CHUNK_SIZE - 1) / CHUNK_SIZE)
+        self.storage = None
+        Field.__init__(self, width, height, colorMown, colorGrown)
+
+    def reset(self):
+        # desktop only
+        import mmap
+        import tempfile
+        self.close()
+        chunks = self.chunksX * self.chunksY
+        planeSize = chunks * self.chunkArea
+        # planes: dots, not mown neighbours, hayball neighbours
+        if self.path is None:
+            self.file = tempfile.TemporaryFile()
+        else:
+            self.file = open(self.path, "w+b")
+        self.file.truncate(3 * planeSize)
+        self.storage = mmap.mmap(self.file.fileno(), 3 * planeSize)
+        view = memoryview(self.storage)
+        self.dots = TiledDots(self, view[0:planeSize])
+        self.mownNear = TiledNearCounts(self, view[planeSize:2 * planeSize])
+        self.hayballsNear = TiledPlane(self, view[2 * planeSize:3 * planeSize])
+        # chunk states
+        self.loaded = bytearray(chunks)
+        self.chunkGrowing = array('I', [0]) * chunks
+        for c in range(chunks):
+            self.chunkGrowing[c] = self.getChunkDots(c)
+        self.dirty = {}
+        self.dirtyAll = True
+        self.recount()
+
+    # give up the storage, views into the map have to go before the map
+    def close(self):
+        if self.storage is None:
+            return
+        for plane in (self.dots, self.mownNear, self.hayballsNear):
+            plane.buffer.release()
+        self.storage.close()
+        self.file.close()
+        self.storage = None
+
+    # untouched dots are between 0 and 3, so the counters are known without reading them
+    def recount(self):
+        self.growing = self.width * self.height
+        self.standing = 0
+        self.hayballs = 0
+        if self.index is not None:
+            self.index.rebuild()
+
+    # storage offset of a dot
+    def getOffset(self, i):
+        x = i % self.width
+        y = int(i / self.width)
+        c = (int(y / self.chunkSize) * self.chunksX) + int(x / self.chunkSize)
+        return (c * self.chunkArea) + ((y % self.chunkSize) * self.chunkSize) + (x % self.chunkSize)
+
+    # number of field dots in chunk c (edge chunks are cut off)
+    def getChunkDots(self, c):
+        x = (c % self.chunksX) * self.chunkSize
+        y = int(c / self.chunksX) * self.chunkSize
+        return min(self.chunkSize, self.width - x) * min(self.chunkSize, self.height - y)
+
+    # number of field dots in the 3x3 neighbourhood of dot i
+    def getNearSize(self, i):
+        x = i % self.width
+        y = int(i / self.width)
+        return (min(x + 2, self.width) - max(x - 1, 0)) * (min(y + 2, self.height) - max(y - 1, 0))
+
+    # fill a chunk with its initial dots on first access, they were peeked at as
+    # getUnloadedDot and count as written since then
+    def load(self, c):
+        if self.loaded[c]:
+            return
+        self.loaded[c] = 1
+        rng = random.Random((self.seedValue * 65537) + c)
+        buffer = self.dots.buffer
+        dirty = None if self.dirtyAll else self.dirty
+        unloaded = self.getUnloadedDot()
+        x0 = (c % self.chunksX) * self.chunkSize
+        y0 = int(c / self.chunksX) * self.chunkSize
+        for lY in range(min(self.chunkSize, self.height - y0)):
+            offset = (c * self.chunkArea) + (lY * self.chunkSize)
+            row = ((y0 + lY) * self.width) + x0
+            for lX in range(min(self.chunkSize, self.width - x0)):
+                buffer[offset + lX] = rng.randrange(self.MAX_MOWN)
+                if dirty is not None and row + lX not in dirty:
+                    dirty[row + lX] = unloaded
+
+    # what an untouched dot is taken for, the mean of its draw
+    def getUnloadedDot(self):
+        return int(self.MAX_MOWN / 2)
+
+    # untouched chunks are not loaded to look at them
+    def peekDot(self, i):
+        offset = self.getOffset(i)
+        if not self.loaded[int(offset / self.chunkArea)]:
+            return self.getUnloadedDot()
+        return self.dots.buffer[offset]
+
+    def setDot(self, i, dot):
+        old = self.dots[i]
+        if old != dot:
+            if (old < self.GROWN) != (dot < self.GROWN):
+                c = int(self.getOffset(i) / self.chunkArea)
+                self.chunkGrowing[c] = self.chunkGrowing[c] + (1 if dot < self.GROWN else -1)
+            Field.setDot(self, i, dot)
+
+    # grow only the chunks that still have growing dots
+    def grow(self):
+        if self.growing > FULL_FRAME_RATIO * self.width * self.height:
+            self.dirtyAll = True
+        buffer = self.dots.buffer
+        for c in range(len(self.chunkGrowing)):
+            if self.chunkGrowing[c] == 0:
+                continue
+            self.load(c)
+            x0 = (c % self.chunksX) * self.chunkSize
+            y0 = int(c / self.chunksX) * self.chunkSize
+            for lY in range(min(self.chunkSize, self.height - y0)):
+                offset = (c * self.chunkArea) + (lY * self.chunkSize)
+                row = ((y0 + lY) * self.width) + x0
+                for lX in range(min(self.chunkSize, self.width - x0)):
+                    dot = buffer[offset + lX]
+                    # grow all dots that are not yet growed
+                    if dot < self.GROWN:
+                        self.setDot(row + lX, dot + randrange(self.GROWTH))
+        return True
+
+    def fill(self, dot):
+        for i in range(self.width * self.height):
+            self.setDot(i, dot)
+        self.dirtyAll = True
+
+    # chunks that were touched so far
+    def getLoadedChunks(self):
+        return sum(self.loaded)
+
+# kinematics for whole arrays of tractor states (numpy)
+# returns next orientation, gear, direction, invert, footprint rotation and x / y offsets
+def stepKinematics(orientation, orientOxo, gear, direction, invert):
+    loadNumpy()
+    table = np.frombuffer(bytes(loadKinematics()), dtype = np.uint8).reshape(-1, K_STRIDE)
+    rows = table[(((((np.asarray(orientation) * 5) + orientOxo) * 3 + gear) * 3 + direction) * 2) + np.asarray(invert, dtype = np.intp)]
+    move = rows[:, K_MOVE]
+    return (
+        rows[:, K_ORIENTATION],
+        rows[:, K_GEAR],
+        rows[:, K_DIRECTION],
+        rows[:, K_INVERT] == 1,
+        rows[:, K_ROTATION],
+        np.array(MOVE_X, dtype = np.int8)[move],
+        np.array(MOVE_Y, dtype = np.int8)[move]
+    )
+
+
+# waypoints (top left of the tractor) per field size
+AUTOPILOT_ROUTES = {}
+
+# back and forth route over the field for the 2x2 tractor, starting where it is staged
+def getCoverageRoute(width, height):
+    key = (width, height)
+    if key not in AUTOPILOT_ROUTES:
+        route = []
+        right = width - 2
+        y = 0
+        east = True
+        while True:
+            route.append((right if east else 0, y))
+            if y >= height - 2:
+                break
+            # shift down by the tractor width
+            y = min(y + 2, height - 2)
+            route.append((right if east else 0, y))
+            east = not east
+        AUTOPILOT_ROUTES[key] = tuple(route)
+    return AUTOPILOT_ROUTES[key]
+
+# steers the player tractor: coverage route while mowing, nearest hayball while gathering
+# only tilts forward or sideways, turns rotate the tractor in place as long as it moves
+class Autopilot():
+    def __init__(self, bauer):
+        self.bauer = bauer
+        self.trac = None
+        self.route = ()
+        self.waypoint = 0
+        # dot indices still to visit
+        self.targets = []
+        self.target = None
+
+    # tractor changed -> new plan for its task
+    def plan(self, trac):
+        field = self.bauer.field
+        self.trac = trac
+        self.target = None
+        self.targets = []
+        self.waypoint = 0
+        if trac.task == Step.MOW:
+            self.route = getCoverageRoute(field.width, field.height)
+        else:
+            self.route = ()
+            self.targets = [i for i in range(len(field.dots)) if field.dots[i] == field.HAYBALL]
+
+    # dots the task is not done with
+    def isOpen(self, i):
+        field = self.bauer.field
+        dot = field.dots[i]
+        if self.trac.task == Step.MOW:
+            return dot > field.MAX_MOWN and dot != field.HAYBALL
+        return dot == field.HAYBALL
+
+    # tractor position covering dot i closest to pos
+    def getCover(self, i, pos):
+        field = self.bauer.field
+        x = i % field.width
+        y = int(i / field.width)
+        coverX = min(max(pos[0], x - 1), x, field.width - 2)
+        coverY = min(max(pos[1], y - 1), y, field.height - 2)
+        return (max(coverX, 0), max(coverY, 0))
+
+    # next position to drive to, None when done
+    def getGoal(self, pos):
+        # follow the route
+        while self.waypoint < len(self.route):
+            if self.route[self.waypoint] != pos:
+                return self.route[self.waypoint]
+            self.waypoint = self.waypoint + 1
+        # replan toward the nearest open dot
+        if self.target is not None and self.isOpen(self.target):
+            return self.getCover(self.target, pos)
+        if len(self.targets) == 0 and self.trac.task == Step.MOW and self.bauer.field.standing > 0:
+            # missed dots after the route
+            self.targets = [i for i in range(len(self.bauer.field.dots)) if self.isOpen(i)]
+        self.targets = [i for i in self.targets if self.isOpen(i)]
+        if len(self.targets) == 0:
+            self.target = None
+            return None
+        best = None
+        for i in self.targets:
+            cover = self.getCover(i, pos)
+            distance = abs(cover[0] - pos[0]) + abs(cover[1] - pos[1])
+            if best is None or distance < best:
+                best = distance
+                self.target = i
+        self.targets.remove(self.target)
+        return self.getCover(self.target, pos)
+
+    def getOrientation(self):
+        trac = self.bauer.trac
+        if trac is not self.trac:
+            self.plan(trac)
+        pos = (min(trac.elements[0::2]), min(trac.elements[1::2]))
+        goal = self.getGoal(pos)
+        if goal is None:
+            return Orientation.NONE
+        heading = trac.orientation
+        # stay on the axis we are driving along while it still needs to change
+        horizontal = goal[0] != pos[0] and (goal[1] == pos[1] or heading == Orientation.EAST or heading == Orientation.WEST)
+        if horizontal:
+            wanted = Orientation.EAST if goal[0] > pos[0] else Orientation.WEST
+        else:
+            wanted = Orientation.SOUTH if goal[1] > pos[1] else Orientation.NORTH
+        if trac.gear == Gear.NEUTRAL and wanted != heading:
+            # turning needs a moving tractor
+            return heading
+        if wanted == (heading + 2) % 4:
+            # tilting backwards would stop the tractor, turn right twice instead
+            return (heading + 1) % 4
+        return wanted
+
+# accelerometer tilted the way the autopilot wants to drive
+class AutopilotAccelerometer():
+    def __init__(self, driver):
+        self.driver = driver
+        self.sample = [0, 0]
+
+    def getRoll(self):
+        pilot = self.driver.pilot
+        self.sample = getTiltSample(pilot.getOrientation() if pilot is not None else Orientation.NONE)
+        return self.sample[0]
+
+    def getPitch(self):
+        return self.sample[1]
+
+# headless driver steered by an autopilot, attach it to the bauer once created
+class AutopilotDriver(HeadlessDriver):
+    def __init__(self, presses = None, fastForward = True, verbose = False):
+        HeadlessDriver.__init__(self, None, presses, fastForward, verbose)
+        self.pilot = None
+
+    def attach(self, bauer):
+        self.pilot = Autopilot(bauer)
+
+    def getSensors(self, threshold):
+        return SensorService(AutopilotAccelerometer(self), self.button, threshold)
+
+# ticks the autopilot needs per phase for each field size
+def benchmarkAutopilot(sizes = (8, 16, 32, 64), seedValue = 0, maxTicks = 1000000):
+    results = []
+    for size in sizes:
+        seed(seedValue)
+        sim = createSimulation({"width": size, "height": size, "autopilot": True})
+        phaseTicks = [0, 0, 0]
+        ticks = 0
+        while sim.seasons < 1 and ticks < maxTicks:
+            step = sim.step
+            if not sim.play():
+                break
+            ticks = ticks + 1 + sim.skipped
+            if step in MC_PHASES:
+                phaseTicks[MC_PHASES.index(step)] += 1 + sim.skipped
+        results.append({
+            "size": size,
+            "grow": phaseTicks[0],
+            "mow": phaseTicks[1],
+            "gather": phaseTicks[2],
+            "completed": sim.seasons >= 1
+        })
+    return results
+
+# regression checks (python the-bauer.py --check), each returns None when it holds or
+# what went wrong
+
+# a season with mowers and gatherers in the fleet ends like a solo season
+def checkFleetSeason(seedValue = 0, maxTicks = 5000):
+    for fleet in (("mow",), ("gather",), ("mow", "gather")):
+        seed(seedValue)
+        sim = Bauer(Step.HELLO, 0, HeadlessDriver(getSnakeScript(FIELD_WIDTH, FIELD_HEIGHT)))
+        for task in fleet:
+            sim.addTractor(sim.getTracMow() if task == "mow" else sim.getTracGather())
+        ticks = 0
+        while sim.seasons < 1 and ticks < maxTicks and sim.play():
+            ticks = ticks + 1
+        if sim.seasons < 1:
+            return "fleet " + "+".join(fleet) + " stuck in " + Step.string[sim.step] + " after " + str(ticks) + " ticks"
+    return None
+
+# step, dots and tractor footprints after every tick of a seeded game on an engine
+def recordGame(engine, seedValue, ticks):
+    seed(seedValue)
+    field = createField(FIELD_WIDTH, FIELD_HEIGHT, engine)
+    sim = Bauer(Step.HELLO, 0, HeadlessDriver(getSnakeScript(FIELD_WIDTH, FIELD_HEIGHT)), field)
+    sim.addTractor(sim.getTracGather())
+    states = []
+    for t in range(ticks):
+        if not sim.play():
+            break
+        states.append((sim.step, bytes([int(field.dots[i]) for i in range(len(field.dots))]), [tuple(trac.elements) for trac in sim.tracs]))
+    return states
+
+# seeded games on the numpy and packed fields go tick by tick like on the list field
+def checkEngines(seedValue = 0, ticks = 500):
+    engines = ["packed"]
+    if loadNumpy() is not None:
+        engines.append("array")
+    reference = recordGame("list", seedValue, ticks)
+    for engine in engines:
+        states = recordGame(engine, seedValue, ticks)
+        for t in range(max(len(states), len(reference))):
+            if t >= len(states) or t >= len(reference) or states[t] != reference[t]:
+                return engine + " differs from list at tick " + str(t)
+    return None
+
+# the kinematics table drives a tractor like the update steps it was compiled from
+def checkKinematics(seedValue = 0, ticks = 2000):
+    seed(seedValue)
+    driver = HeadlessDriver([getTiltSample(randrange(5)) for t in range(ticks)])
+    table = Tractor(COL_TRAC_MOW_BACK, COL_TRAC_MOW_FRONT, Orientation.EAST, Direction.STRAIGHT, Gear.NEUTRAL, driver, Occupancy(FIELD_WIDTH, FIELD_HEIGHT))
+    steps = Tractor(COL_TRAC_MOW_BACK, COL_TRAC_MOW_FRONT, Orientation.EAST, Direction.STRAIGHT, Gear.NEUTRAL, driver, Occupancy(FIELD_WIDTH, FIELD_HEIGHT))
+    for t in range(ticks):
+        table.updateOxocard()
+        table.drive(table.oxo.orientation)
+        steps.updateOxocard()
+        steps.updateDifference()
+        steps.updateGear()
+        steps.updateDirection()
+        steps.updateElements()
+        if list(table.elements) != list(steps.elements) or (table.orientation, table.gear, table.direction, table.invert) != (steps.orientation, steps.gear, steps.direction, steps.invert):
+            return "table and update steps differ at tick " + str(t)
+    return None
+
+CHECKS = [
+    ("fleet season", checkFleetSeason),
+    ("engines", checkEngines),
+    ("kinematics", checkKinematics)
+]
+
+# runs the checks, returns the failed ones: name -> what went wrong
+def runChecks(log = None):
+    failed = {}
+    for name, check in CHECKS:
+        problem = check()
+        if problem is not None:
+            failed[name] = problem
+        if log is not None:
+            log(name + ": " + ("ok" if problem is None else problem))
+    return failed
+
+# monte carlo season simulation on a process pool
+# every worker owns one row of a shared array it adds its results to:
+# runs, seasons, timeouts, tick histograms for grow / mow / gather, hayball histogram
+MC_BINS = 1024
+MC_RUNS = 0
+MC_SEASONS = 1
+MC_TIMEOUTS = 2
+MC_HISTOGRAMS = 3
+MC_ROW = MC_HISTOGRAMS + (4 * MC_BINS)
+MC_PHASES = (Step.GROW, Step.MOW, Step.GATHER)
+
+# shared state of a pool worker
+mcResults = None
+mcRow = None
+
+def initMonteCarloWorker(results, rows):
+    global mcResults, mcRow
+    mcResults = results
+    # claim a row
+    with rows.get_lock():
+        mcRow = rows.value
+        rows.value = rows.value + 1
+
+# headless bauer with the given rule parameters
+# params: width, height, MAX_MOWN, GROWN, GROWTH, offsets, samples or autopilot
+def createSimulation(params):
+    width = params.get("width", FIELD_WIDTH)
+    height = params.get("height", FIELD_HEIGHT)
+    flags = dict((flag, params[flag]) for flag in ("MAX_MOWN", "GROWN", "GROWTH") if flag in params)
+    field = createField(width, height, None, flags)
+    # second draw as before, keeps the results per seed
+    field.reset()
+    if params.get("autopilot"):
+        driver = AutopilotDriver()
+    else:
+        samples = params.get("samples")
+        if samples is None:
+            samples = getSnakeScript(width, height)
+        driver = HeadlessDriver(samples)
+    sim = Bauer(Step.HELLO, 0, driver, field)
+    if params.get("autopilot"):
+        driver.attach(sim)
+    if "offsets" in params:
+        sim.offsets = list(params["offsets"])
+        sim.resetOffsets()
+    return sim
+
+def addToBin(row, histogram, value):
+    row[MC_HISTOGRAMS + (histogram * MC_BINS) + min(value, MC_BINS - 1)] += 1
+
+# runs the seasons of every seed and adds the results to the worker's row
+def runMonteCarloTask(task):
+    seeds, seasons, params, maxTicks = task
+    base = mcRow * MC_ROW
+    # local row, copied into shared memory once per task
+    row = [0] * MC_ROW
+    for seedValue in seeds:
+        seed(seedValue)
+        sim = createSimulation(params)
+        phaseTicks = [0, 0, 0]
+        ticks = 0
+        while sim.seasons < seasons and ticks < maxTicks:
+            step = sim.step
+            if not sim.play():
+                break
+            ticks = ticks + 1 + sim.skipped
+            if step in MC_PHASES:
+                phaseTicks[MC_PHASES.index(step)] += 1 + sim.skipped
+            # hayballs are complete when mowing ends
+            if step == Step.MOW and sim.step == Step.GATHER:
+                addToBin(row, 3, sim.field.hayballs)
+            # season complete
+            if step == Step.GATHER and sim.step == Step.GROW:
+                for p in range(3):
+                    addToBin(row, p, phaseTicks[p])
+                phaseTicks = [0, 0, 0]
+                row[MC_SEASONS] += 1
+        if sim.seasons < seasons:
+            row[MC_TIMEOUTS] += 1
+        row[MC_RUNS] += 1
+    for k in range(MC_ROW):
+        if row[k]:
+            mcResults[base + k] += row[k]
+    return len(seeds)
+
+# percentile from a histogram
+def getPercentile(histogram, share):
+    total = sum(histogram)
+    if total == 0:
+        return 0
+    limit = share * total
+    count = 0
+    for value in range(len(histogram)):
+        count = count + histogram[value]
+        if count >= limit:
+            return value
+    return len(histogram) - 1
+
+class MonteCarlo():
+    def __init__(self, runs, seasons = 1, params = None, processes = None, chunk = 8, firstSeed = 0, maxTicks = 100000):
+        self.runs = runs
+        self.seasons = seasons
+        self.params = params or {}
+        self.processes = processes
+        self.chunk = chunk
+        self.firstSeed = firstSeed
+        self.maxTicks = maxTicks
+        self.results = None
+        self.rows = 0
+
+    # runs the simulation, yields a summary whenever a task finished
+    # stop iterating (or interrupt) to end early, the last summary stays available
+    def run(self):
+        # desktop only
+        import multiprocessing
+        processes = self.processes or multiprocessing.cpu_count()
+        self.rows = processes
+        self.results = multiprocessing.RawArray("q", processes * MC_ROW)
+        rowCounter = multiprocessing.Value("i", 0)
+        tasks = []
+        for start in range(self.firstSeed, self.firstSeed + self.runs, self.chunk):
+            seeds = list(range(start, min(start + self.chunk, self.firstSeed + self.runs)))
+            tasks.append((seeds, self.seasons, self.params, self.maxTicks))
+        pool = multiprocessing.Pool(processes, initMonteCarloWorker, (self.results, rowCounter))
+        try:
+            for done in pool.imap_unordered(runMonteCarloTask, tasks):
+                yield self.getSummary()
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    # sums the worker rows
+    def getTotals(self):
+        totals = [0] * MC_ROW
+        for r in range(self.rows):
+            base = r * MC_ROW
+            for k in range(MC_ROW):
+                totals[k] = totals[k] + self.results[base + k]
+        return totals
+
+    def getSummary(self):
+        totals = self.getTotals()
+        summary = {
+            "runs": totals[MC_RUNS],
+            "seasons": totals[MC_SEASONS],
+            "timeouts": totals[MC_TIMEOUTS]
+        }
+        names = ("grow", "mow", "gather", "hayballs")
+        for h in range(4):
+            histogram = totals[MC_HISTOGRAMS + (h * MC_BINS):MC_HISTOGRAMS + ((h + 1) * MC_BINS)]
+            count = sum(histogram)
+            summary[names[h]] = {
+                "mean": sum(value * histogram[value] for value in range(MC_BINS)) / count if count > 0 else 0,
+                "p50": getPercentile(histogram, 0.5),
+                "p90": getPercentile(histogram, 0.9),
+                "p99": getPercentile(histogram, 0.99)
+            }
+        return summary
+
+# drivers for this run
+# default driver, created on first use
+
+# notes the time from the script start to the first image() of the wrapped driver
+class StartupProbe():
+    def __init__(self, driver):
+        self.driver = driver
+        self.firstImage = None
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def image(self, frame, width):
+        if self.firstImage is None:
+            self.firstImage = monotonic() - STARTED
+        self.driver.image(frame, width)
+
+# cold start: seconds to load the script and to the first image()
+# launched: wall clock time the process was started at, counts the interpreter start
+# and the compile of the script too (STARTED is only taken once the script runs)
+def benchmarkStartup(launched = None):
+    before = 0
+    if launched is not None:
+        before = (time.time() - launched) - (monotonic() - STARTED)
+    loaded = before + monotonic() - STARTED
+    probe = StartupProbe(getDriver())
+    bauer = Bauer(Step.HELLO, 0, probe)
+    while probe.firstImage is None and bauer.play():
+        pass
+    probe.close()
+    return {"loaded": loaded, "firstImage": before + probe.firstImage}
+
+# bytes per live instance: tractors (with oxocard and sensors) and fields per engine
+# measured with tracemalloc (desktop only)
+def benchmarkMemory(tractors = 100000, fields = 1000, engines = ("list", "packed")):
+    import tracemalloc
+    driver = HeadlessDriver(getSnakeScript(FIELD_WIDTH, FIELD_HEIGHT))
+    occupancy = Occupancy(FIELD_WIDTH, FIELD_HEIGHT)
+    result = {}
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    alive = [Tractor(COL_TRAC_MOW_BACK, COL_TRAC_MOW_FRONT, Orientation.EAST, Direction.STRAIGHT, Gear.NEUTRAL, driver, occupancy) for t in range(tractors)]
+    result["tractor"] = (tracemalloc.get_traced_memory()[0] - start) / tractors
+    alive = None
+    for engine in engines:
+        start = tracemalloc.get_traced_memory()[0]
+        alive = [createField(FIELD_WIDTH, FIELD_HEIGHT, engine) for f in range(fields)]
+        result["field " + engine] = (tracemalloc.get_traced_memory()[0] - start) / fields
+        alive = None
+    tracemalloc.stop()
+    return result
+
+# streams a simulation to a mirror over a local socket pair and checks the mirror after
+# every tick (desktop only)
+def benchmarkStreaming(seasons = 2, seedValue = 0, keyframeEvery = STREAM_KEYFRAME_EVERY):
+    import socket
+    if seedValue is not None:
+        seed(seedValue)
+    sim = createSimulation({"autopilot": True})
+    publisher = StatePublisher(keyframeEvery)
+    sending, receiving = socket.socketpair()
+    mirror = StateSubscriber(receiving)
+    publisher.subscribe(sending)
+    sim.publisher = publisher
+    inSync = True
+    while sim.seasons < seasons and sim.play():
+        mirror.receive()
+        inSync = inSync and list(mirror.dots) == [sim.field.dots[i] for i in range(len(sim.field.dots))]
+    sending.close()
+    receiving.close()
+    return {
+        "ticks": publisher.ticks,
+        "inSync": inSync,
+        "transitions": len(mirror.transitions),
+        "keyframes": publisher.keyframes,
+        "keyframeBytes": publisher.keyframeBytes / max(1, publisher.keyframes),
+        "deltas": publisher.deltas,
+        "deltaBytes": publisher.deltaBytes / max(1, publisher.deltas)
+    }
+
+# benchmark suite: every phase on every field and fleet size with scripted tractors on
+# the headless driver, results appended to a json history and compared to a baseline
+BENCH_SIZES = (8, 64, 512, 4096)
+BENCH_FLEETS = (1, 8)
+# engine per field size, above the limit the numpy field (or the packed one)
+BENCH_LIST_LIMIT = 512
+BENCH_HISTORY = "bench-history.jsonl"
+BENCH_BASELINE = "bench-baseline.json"
+# slower than the baseline by more than this share -> regression
+BENCH_TOLERANCE = 0.2
+# timed rounds per case, the fastest counts
+BENCH_ROUNDS = 5
+# the tractors drive a closed snake over at most this many columns
+BENCH_ROUTE = 64
+# ticks per grow round, a field filled with mown dots is not grown before
+BENCH_GROW_TICKS = 8
+# timed ticks per mow / gather round at least, however large the field
+BENCH_MIN_TICKS = 50
+# dots per phase and what the field starts as
+BENCH_PHASES = (
+    (Step.GROW, "grow", 0),
+    (Step.MOW, "mow", Field.GROWN),
+    (Step.GATHER, "gather", Field.HAYBALL)
+)
+
+# rows of the bench route, the fleet is spread over the rows below
+def getBenchRows(size):
+    return max(2, int(min(size, BENCH_ROUTE) / 2))
+
+# snake over the upper rows that ends where it started, keeps the tractors on the field
+def getBenchScript(size):
+    return getSnakeScript(min(size, BENCH_ROUTE), getBenchRows(size))
+
+def getBenchEngine(size):
+    if size <= BENCH_LIST_LIMIT:
+        return "list"
+    return "array" if loadNumpy() is not None else "packed"
+
+# ticks of one phase: field filled with the phase's start dots before every round, fleet
+# spread over the rows, the phase kept from ending. returns ticks / second and ns per
+# dot and tick of the fastest round, mean microseconds per profiled part of a tick and
+# the peak memory of the setup
+def benchmarkPhase(step, start, size, fleet, ticks = None, seedValue = 0, rounds = BENCH_ROUNDS):
+    import tracemalloc
+    seed(seedValue)
+    cells = size * size
+    if ticks is None:
+        # growing touches every dot, mowing and gathering only the dots under the tractors
+        if step == Step.GROW:
+            ticks = max(1, min(BENCH_GROW_TICKS, int(1000000 / cells)))
+        else:
+            ticks = min(200, max(BENCH_MIN_TICKS, int(1000000 / cells)))
+    tracemalloc.start()
+    driver = HeadlessDriver(getBenchScript(size))
+    sim = Bauer(step, 0, driver, createField(size, size, getBenchEngine(size)))
+    sim.offsets = [1 << 30, 1 << 30, 1 << 30]
+    sim.resetOffsets()
+    if step == Step.GATHER:
+        sim.setTrac(sim.getTracGather())
+    for t in range(fleet - 1):
+        trac = sim.getTracGather() if step == Step.GATHER else sim.getTracMow()
+        trac.moveElements(Orientation.SOUTH, (2 * (t + 1)) % max(1, size - getBenchRows(size) + 1))
+        sim.addTractor(trac)
+    sim.field.fill(start)
+    # first tick builds caches (viewport pyramid), not timed
+    sim.update()
+    peakMemory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    profiler = Profiler(ticks * rounds)
+    seconds = None
+    for r in range(rounds):
+        # every round starts from the same field, the refill and the full repaint after
+        # it are not timed
+        sim.field.fill(start)
+        sim.startGrowth()
+        sim.profiler = None
+        sim.update()
+        sim.profiler = profiler
+        began = monotonic()
+        for t in range(ticks):
+            sim.update()
+        elapsed = monotonic() - began
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+    phases = profiler.getSummary()["phases"]
+    return {
+        "engine": getBenchEngine(size),
+        "ticks": ticks,
+        "ticksPerSecond": ticks / seconds,
+        "nsPerCell": (seconds * 1000000000) / (ticks * cells),
+        "microseconds": dict((name, phases[name]["mean"]) for name in phases if phases[name]["mean"] > 0),
+        "peakMemory": peakMemory
+    }
+
+def benchmarkSuite(sizes = BENCH_SIZES, fleets = BENCH_FLEETS, seedValue = 0, log = None):
+    results = {}
+    for size in sizes:
+        for fleet in fleets:
+            for step, name, start in BENCH_PHASES:
+                key = name + " " + str(size) + "x" + str(size) + " fleet " + str(fleet)
+                results[key] = benchmarkPhase(step, start, size, fleet, None, seedValue)
+                if log is not None:
+                    log(key + ": " + str(round(results[key]["ticksPerSecond"], 1)) + " ticks/s")
+    return {
+        "time": time.time(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "results": results
+    }
+
+# keys that got slower than the baseline: key -> [baseline, current] ticks / second
+def compareBenchmarks(run, baseline, tolerance = BENCH_TOLERANCE):
+    regressions = {}
+    for key in run["results"]:
+        if key in baseline["results"]:
+            before = baseline["results"][key]["ticksPerSecond"]
+            now = run["results"][key]["ticksPerSecond"]
+            if now < before * (1 - tolerance):
+                regressions[key] = [before, now]
+    return regressions
+
+# runs the suite, appends it to the history and compares it to the baseline (saved
+# instead when asked or missing). returns the run and its regressions
+def runBenchmarks(sizes = BENCH_SIZES, fleets = BENCH_FLEETS, history = BENCH_HISTORY, baseline = BENCH_BASELINE, saveBaseline = False, log = None):
+    import json
+    import os
+    run = benchmarkSuite(sizes, fleets, 0, log)
+    with open(history, "a") as f:
+        f.write(json.dumps(run) + "\n")
+    regressions = {}
+    if saveBaseline or not os.path.exists(baseline):
+        with open(baseline, "w") as f:
+            json.dump(run, f, indent = 1)
+    else:
+        with open(baseline) as f:
+            regressions = compareBenchmarks(run, json.load(f))
+    return run, regressions
+
+# runs the startup benchmark in fresh interpreters, timed from the launch
+def benchmarkColdStart(runs = 5):
+    import json
+    import subprocess
+    results = []
+    for r in range(runs):
+        output = subprocess.check_output([sys.executable, __file__, "--startup-bench", repr(time.time())])
+        results.append(json.loads(output.decode().strip().split("\n")[-1]))
+    firstImages = sorted(result["firstImage"] for result in results)
+    return {
+        "runs": runs,
+        "loaded": min(result["loaded"] for result in results),
+        "firstImageMin": firstImages[0],
+        "firstImageMedian": firstImages[int(runs / 2)]
+    }
+
+# runs the tooling of the desktop flags
+def runDesktop(args):
+    if "--replay" in args:
+        ticks, seconds = replay(args[args.index("--replay") + 1])
+        print("replayed " + str(ticks) + " ticks in " + str(seconds) + "s")
+    elif "--startup-bench" in args:
+        # python the-bauer.py --startup-bench [LAUNCHED]
+        import json
+        rest = args[args.index("--startup-bench") + 1:]
+        print(json.dumps(benchmarkStartup(float(rest[0]) if len(rest) > 0 else None)))
+    elif "--coldstart-bench" in args:
+        print(benchmarkColdStart())
+    elif "--bench" in args:
+        # python the-bauer.py --bench [SIZE ..] [--save-baseline], exits with 1 on regressions
+        sizes = [int(arg) for arg in args[args.index("--bench") + 1:] if arg.isdigit()] or BENCH_SIZES
+        run, regressions = runBenchmarks(sizes, saveBaseline = "--save-baseline" in args, log = print)
+        for key in regressions:
+            print("regression " + key + ": " + str(int(regressions[key][0])) + " -> " + str(int(regressions[key][1])) + " ticks/s")
+        if len(regressions) > 0:
+            sys.exit(1)
+    elif "--check" in args:
+        if len(runChecks(print)) > 0:
+            sys.exit(1)
+    elif "--stream-bench" in args:
+        print(benchmarkStreaming())
+    elif "--memory-bench" in args:
+        print(benchmarkMemory())
+    elif "--autopilot-bench" in args:
+        for result in benchmarkAutopilot():
+            print(result)
+    elif "--montecarlo" in args:
+        # python the-bauer.py --montecarlo RUNS
+        mc = MonteCarlo(int(args[args.index("--montecarlo") + 1]))
+        summary = None
+        try:
+            for summary in mc.run():
+                print(str(summary["runs"]) + " runs, mow p50 " + str(summary["mow"]["p50"]) + ", hayballs mean " + str(summary["hayballs"]["mean"]))
+        except KeyboardInterrupt:
+            summary = mc.getSummary()
+        print(summary)
+    elif "--profile" in args:
+        # python the-bauer.py --profile SEASONS: headless autopilot seasons, summary as json
+        import json
+        sim = createSimulation({"autopilot": True})
+        sim.profiler = Profiler(4096)
+        seasons = int(args[args.index("--profile") + 1])
+        while sim.seasons < seasons and sim.play():
+            pass
+        print(json.dumps(sim.profiler.getSummary(), indent = 1))
@@ -1,30 +1,184 @@
-from oxocard import *
-from oxocardext import *
-from oxobutton import *
-from oxoaccelerometer import *
-from math import *
-from random import randrange
-
-# implement enum
-def Enum(*sequential, **named):
-    enums = dict(zip(sequential, range(len(sequential))), **named)
-    reverse = dict((value, key) for key, value in enums.items())
-    enums["string"] = reverse
-    return type("Enum", (), enums)
-
-# enums
-Step = Enum("HELLO", "GROW", "MOW", "GATHER", "BYE")
-Orientation = Enum("EAST", "SOUTH", "WEST", "NORTH", "NONE")
-Difference = Enum("SAME", "LEFT", "RIGHT", "OPPOSITE")
-Direction = Enum("STRAIGHT", "LEFT", "RIGHT")
-Gear = Enum("FORWARD", "NEUTRAL", "REVERSE")
+import time
+# monotonic clock in seconds: time.monotonic on the desktop, on micropython (where
+# time.time has whole seconds) the wrapping millisecond ticks summed up since the start
+if hasattr(time, "monotonic"):
+    monotonic = time.monotonic
+elif hasattr(time, "ticks_ms"):
+    # last ticks read, milliseconds since the start
+    CLOCK = [time.ticks_ms(), 0]
+
+    def monotonic():
+        now = time.ticks_ms()
+        CLOCK[1] = CLOCK[1] + time.ticks_diff(now, CLOCK[0])
+        CLOCK[0] = now
+        return CLOCK[1] / 1000
+else:
+    monotonic = time.time
+# start of the script, for the cold start benchmark
+STARTED = monotonic()
+import sys
+import _thread
+import struct
+import heapq
+import random
+from array import array
+from random import randrange, seed
+# numpy (desktop only) for array backed fields and asyncio (uasyncio on the device),
+# both imported on first use by loadNumpy / loadAsyncio, None until then or if missing
+np = None
+asyncio = None
+
+def loadNumpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+# desktop tooling in the-bauer-desktop.py next to the script: numpy and memory mapped
+# field engines, batched kinematics, autopilot, streaming, checks, monte carlo and
+# benchmarks, replay. it stays off the oxocard and is loaded into this script on first use
+DESKTOP = None
+DESKTOP_FLAGS = ("--replay", "--startup-bench", "--coldstart-bench", "--bench", "--check", "--stream-bench", "--memory-bench", "--autopilot-bench", "--montecarlo", "--profile")
+
+def loadDesktop():
+    global DESKTOP
+    if DESKTOP is None:
+        path = __file__[:-len(".py")] + "-desktop.py"
+        source = open(path).read()
+        exec(compile(source, path, "exec"), globals())
+        DESKTOP = True
+    return DESKTOP
+
+def loadAsyncio():
+    global asyncio
+    if asyncio is None:
+        try:
+            import asyncio as module
+        except ImportError:
+            try:
+                import uasyncio as module
+            except ImportError:
+                return None
+        asyncio = module
+    return asyncio
+
+# enums, plain constants with their names by value in string
+class Step():
+    HELLO = 0
+    GROW = 1
+    MOW = 2
+    GATHER = 3
+    BYE = 4
+    string = ("HELLO", "GROW", "MOW", "GATHER", "BYE")
+
+class Orientation():
+    EAST = 0
+    SOUTH = 1
+    WEST = 2
+    NORTH = 3
+    NONE = 4
+    string = ("EAST", "SOUTH", "WEST", "NORTH", "NONE")
+
+class Difference():
+    SAME = 0
+    LEFT = 1
+    RIGHT = 2
+    OPPOSITE = 3
+    string = ("SAME", "LEFT", "RIGHT", "OPPOSITE")
+
+class Direction():
+    STRAIGHT = 0
+    LEFT = 1
+    RIGHT = 2
+    string = ("STRAIGHT", "LEFT", "RIGHT")
+
+class Gear():
+    FORWARD = 0
+    NEUTRAL = 1
+    REVERSE = 2
+    string = ("FORWARD", "NEUTRAL", "REVERSE")
+
+# device modules (missing when running headless on a desktop) are imported on first
+# use, None -> not checked yet
+HARDWARE = None
+
+# firmware names the drivers use
+DISPLAY_NAMES = ("image", "dot", "repaint", "enableRepaint", "bigTextScroll", "sleep")
+SENSOR_NAMES = ("Button", "BUTTON_R1", "Accelerometer")
+
+# like "from module import name, .." at runtime for the names the modules have,
+# later modules win as with "import *"
+def importNames(modules, names):
+    scope = globals()
+    for name in modules:
+        module = __import__(name)
+        for key in names:
+            if hasattr(module, key):
+                scope[key] = getattr(module, key)
+
+# display modules, True when running on the device
+def loadDisplay():
+    global HARDWARE
+    if HARDWARE is None:
+        try:
+            importNames(("oxocard", "oxocardext"), DISPLAY_NAMES)
+            HARDWARE = True
+        except ImportError:
+            HARDWARE = False
+    return HARDWARE
+
+def loadSensors():
+    importNames(("oxocard", "oxocardext", "oxobutton", "oxoaccelerometer"), SENSOR_NAMES)
 
 # basic initializations
-enableRepaint(False)
 INTERVALL = 0.5
+# skip the sleep between ticks
+FAST_FORWARD = False
+# collect per tick timings (see Profiler)
+PROFILE = False
+# background sensor sampling on the device: samples per second (0 -> poll on read),
+# smoothing factor for roll / pitch (1 -> raw) and samples a press must last
+SENSOR_RATE = 25
+SENSOR_SMOOTHING = 0.5
+SENSOR_DEBOUNCE = 2
+# render at most every RENDER_INTERVALL seconds (simulation runs every INTERVALL)
+RENDER_INTERVALL = INTERVALL
+# longest tick period while nothing moves
+IDLE_INTERVALL = 2
 accelerometerThreshold = 9
 FIELD_WIDTH = 8
 FIELD_HEIGHT = 8
+# field implementation ("list", "array", "tiled" or "packed", array needs numpy, tiled needs mmap)
+FIELD_ENGINE = "list"
+# side length of the chunks a tiled field is stored in
+CHUNK_SIZE = 64
+# file backing a tiled field (None -> temporary file)
+FIELD_FILE = None
+# led matrix, larger fields are shown through a viewport following the tractor
+DISPLAY_WIDTH = 8
+DISPLAY_HEIGHT = 8
+# keep rectangle counts per dot category (see FieldIndex) for region queries and the
+# harvest summary of every season, sub-plots of HARVEST_REGION x HARVEST_REGION dots
+FIELD_INDEX = False
+HARVEST_REGION = 4
+# grow only the dots due in a tick from sampled events (see GrowthScheduler), same
+# growth statistics but other random draws than Field.grow
+GROWTH_EVENTS = False
+# viewport zoom, one pixel shows 2^VIEW_ZOOM x 2^VIEW_ZOOM dots
+VIEW_ZOOM = 0
+# scroll texts as frames through the renderer instead of the blocking firmware scroll
+TEXT_FRAMES = True
+# draw text frames over the field instead of black
+TEXT_OVERLAY = True
+# text columns scrolled per second whatever the tick intervall, one per drawn frame
+# when fast forwarding
+TEXT_RATE = 8
+# share of changed dots from which on the whole frame is painted
+FULL_FRAME_RATIO = 0.5
 # colors
 COL_BLACK =   0x000000
 COL_WHITE =   0xffffff
@@ -57,40 +211,389 @@ COL_TRAC_GATHER_BACK = COL_WHITE
 # field colors
 COL_FIELD_GROWN = COL_BEIGE
 COL_FIELD_MOWN = COL_BROWN
+# scrolled text color
+COL_TEXT = COL_WHITE
+
+# sensors
+def classifyOrientation(roll, pitch, threshold):
+    orientation = Orientation.NONE
+    # west < 0 < east
+    rollAbs = abs(roll)
+    # north < 0 < south
+    pitchAbs = abs(pitch)
+    # check west/east
+    if rollAbs > pitchAbs and rollAbs > threshold:
+        if roll < 0:
+            orientation = Orientation.WEST
+        else:
+            orientation = Orientation.EAST
+    # check north/south
+    elif pitchAbs > rollAbs and pitchAbs > threshold:
+        if pitch < 0:
+            orientation = Orientation.NORTH
+        else:
+            orientation = Orientation.SOUTH
+
+    return orientation
+
+# samples accelerometer and button, on a background thread when rate > 0
+# otherwise the sensors are polled when read (deterministic for scripts and replays)
+class SensorService():
+    def __init__(self, acc, button, threshold, rate = 0, smoothing = 1, debounce = 1):
+        self.acc = acc
+        self.button = button
+        self.threshold = threshold
+        self.rate = rate
+        self.smoothing = smoothing
+        self.debounce = debounce
+        # latest filtered values
+        self.roll = 0
+        self.pitch = 0
+        self.orientation = Orientation.NONE
+        # consecutive pressed samples, presses latched by the sampler and the count the
+        # reader saw last (each side only writes its own, so no press gets lost)
+        self.held = 0
+        self.presses = 0
+        self.seen = 0
+        self.running = False
+        self.samples = 0
+
+    def start(self):
+        if self.rate > 0 and not self.running:
+            self.running = True
+            _thread.start_new_thread(self.loop, ())
+
+    def stop(self):
+        self.running = False
+
+    def loop(self):
+        while self.running:
+            self.sampleAccelerometer()
+            self.sampleButton()
+            time.sleep(1 / self.rate)
+
+    def sampleAccelerometer(self):
+        roll = self.acc.getRoll()
+        pitch = self.acc.getPitch()
+        if self.smoothing >= 1:
+            self.roll = roll
+            self.pitch = pitch
+        else:
+            self.roll = self.roll + (self.smoothing * (roll - self.roll))
+            self.pitch = self.pitch + (self.smoothing * (pitch - self.pitch))
+        self.orientation = classifyOrientation(self.roll, self.pitch, self.threshold)
+        self.samples = self.samples + 1
+
+    def sampleButton(self):
+        if self.button.isPressed():
+            self.held = self.held + 1
+            # latch once per press
+            if self.held == self.debounce:
+                self.presses = self.presses + 1
+        else:
+            self.held = 0
+
+    def getOrientation(self):
+        if not self.running:
+            self.sampleAccelerometer()
+        return self.orientation
+
+    # accelerometer interface, roll is read first
+    def getRoll(self):
+        if not self.running:
+            self.sampleAccelerometer()
+        return self.roll
+
+    def getPitch(self):
+        return self.pitch
+
+    # button interface, a press is reported once even if it happened between reads
+    def isPressed(self):
+        if not self.running:
+            return self.button.isPressed()
+        presses = self.presses
+        if presses == self.seen:
+            return False
+        self.seen = presses
+        return True
+
+# drivers
+# forwards display, sensors and timing to the oxocard modules
+# the display is set up on the first output, the sensors on the first getSensors
+class OxoDriver():
+    def __init__(self, fastForward = False):
+        self.fastForward = fastForward
+        self.sensors = None
+        self.repaintEnabled = True
+        self.ready = False
+
+    def enableRepaint(self, enabled):
+        self.repaintEnabled = enabled
+        if self.ready:
+            enableRepaint(enabled)
+
+    def setup(self):
+        loadDisplay()
+        enableRepaint(self.repaintEnabled)
+        self.ready = True
+
+    # packed frame -> rows for the display
+    def image(self, frame, width):
+        if not self.ready:
+            self.setup()
+        image([list(frame[y * width:(y + 1) * width]) for y in range(int(len(frame) / width))])
+
+    def dot(self, x, y, color):
+        if not self.ready:
+            self.setup()
+        dot(x, y, color)
+
+    def repaint(self):
+        if not self.ready:
+            self.setup()
+        repaint()
+
+    def bigTextScroll(self, text):
+        if not self.ready:
+            self.setup()
+        bigTextScroll(text)
+
+    # one sampled accelerometer and button for the whole game
+    def getSensors(self, threshold):
+        if self.sensors is None:
+            loadSensors()
+            self.sensors = SensorService(Accelerometer.create(), Button(BUTTON_R1), threshold, SENSOR_RATE, SENSOR_SMOOTHING, SENSOR_DEBOUNCE)
+            self.sensors.start()
+        return self.sensors
+
+    def sleep(self, seconds):
+        if not self.fastForward:
+            loadDisplay()
+            sleep(seconds)
+
+    def log(self, text):
+        print(text)
+
+    def close(self):
+        if self.sensors is not None:
+            self.sensors.stop()
+
+# replays a list of [roll, pitch] samples (looped)
+class ScriptedAccelerometer():
+    def __init__(self, samples):
+        self.samples = samples
+        self.index = -1
+
+    def getRoll(self):
+        # every orientation poll reads roll first -> advance to next sample
+        self.index = self.index + 1
+        return self.getSample()[0]
+
+    def getPitch(self):
+        return self.getSample()[1]
+
+    def getSample(self):
+        if len(self.samples) == 0:
+            return [0, 0]
+        return self.samples[self.index % len(self.samples)]
+
+# reads as pressed on the given poll numbers
+class ScriptedButton():
+    def __init__(self, presses = None):
+        self.presses = set(presses or [])
+        self.polls = 0
+
+    def isPressed(self):
+        pressed = self.polls in self.presses
+        self.polls = self.polls + 1
+        return pressed
+
+# null display with scripted sensors for desktop simulation
+class HeadlessDriver():
+    def __init__(self, samples = None, presses = None, fastForward = True, verbose = False):
+        self.fastForward = fastForward
+        self.verbose = verbose
+        self.samples = samples or []
+        self.button = ScriptedButton(presses)
+        # last output, for inspection
+        self.frame = None
+        self.text = None
+        self.frames = 0
+        self.pixels = 0
+
+    def enableRepaint(self, enabled):
+        pass
+
+    def image(self, frame, width):
+        self.frame = frame
+        self.pixels = self.pixels + len(frame)
+
+    def dot(self, x, y, color):
+        self.pixels = self.pixels + 1
+
+    def repaint(self):
+        self.frames = self.frames + 1
+
+    def bigTextScroll(self, text):
+        self.text = text
+
+    # polled raw, every oxocard replays the accelerometer script from the start
+    def getSensors(self, threshold):
+        return SensorService(ScriptedAccelerometer(self.samples), self.button, threshold)
+
+    def sleep(self, seconds):
+        if not self.fastForward:
+            time.sleep(seconds)
+
+    def log(self, text):
+        if self.verbose:
+            print(text)
+
+    def close(self):
+        pass
+
+# accelerometer samples for a tilted oxocard
+def getTiltSample(orientation):
+    tiltSwitcher = {
+        Orientation.EAST: [30, 0],
+        Orientation.SOUTH: [0, 30],
+        Orientation.WEST: [-30, 0],
+        Orientation.NORTH: [0, -30]
+    }
+    return tiltSwitcher.get(orientation, [0, 0])
+
+# closed tour that drives a staged tractor over the whole field and back to its start
+# (turning only rotates the tractor in place, so every heading change costs one sample)
+def getSnakeScript(width, height):
+    # staged tractor covers x = 1..2 / y = 0..1 facing east
+    span = width - 2
+    passes = int((height + 1) / 2)
+    orients = [Orientation.EAST] * (span - 1)
+    for p in range(1, passes):
+        # turn and shift down by the tractor width
+        orients = orients + [Orientation.SOUTH] * 3
+        heading = Orientation.WEST if p % 2 == 1 else Orientation.EAST
+        orients = orients + [heading] * (1 + span)
+    # drive back to the top row
+    orients = orients + [Orientation.NORTH] * (1 + 2 * (passes - 1))
+    if passes % 2 == 1:
+        # finished on the right side -> back to the left edge
+        orients = orients + [Orientation.WEST] * (1 + span) + [Orientation.NORTH]
+    # turn east and move onto the start position
+    orients = orients + [Orientation.EAST] * 2
+    return [getTiltSample(o) for o in orients]
+
+# session log
+# header: magic, version, rng seed
+# records: tag byte (kind | encoding) followed by the value
+LOG_MAGIC = b"BAUER"
+LOG_VERSION = 1
+LOG_TICK = 0x01
+LOG_RELEASED = 0x02
+LOG_PRESSED = 0x03
+LOG_ROLL = 0x10
+LOG_PITCH = 0x20
+# value encodings, the smallest one that reproduces the value exactly is used
+LOG_INT8 = 0x00
+LOG_FLOAT32 = 0x01
+LOG_FLOAT64 = 0x02
+LOG_FORMATS = {
+    LOG_INT8: "<b",
+    LOG_FLOAT32: "<f",
+    LOG_FLOAT64: "<d"
+}
+
+# writes seed and every sensor read of a session to a log, records are only appended
+class SessionRecorder():
+    def __init__(self, path, seedValue):
+        self.file = open(path, "wb")
+        self.file.write(LOG_MAGIC + struct.pack("<BI", LOG_VERSION, seedValue))
+
+    def writeValue(self, kind, value):
+        if value == int(value) and value >= -128 and value < 128:
+            encoding = LOG_INT8
+            value = int(value)
+        elif struct.unpack("<f", struct.pack("<f", value))[0] == value:
+            encoding = LOG_FLOAT32
+        else:
+            encoding = LOG_FLOAT64
+        self.file.write(bytes([kind | encoding]) + struct.pack(LOG_FORMATS[encoding], value))
+
+    def writeTag(self, tag):
+        self.file.write(bytes([tag]))
+
+    def close(self):
+        self.file.close()
+
+class RecordingAccelerometer():
+    def __init__(self, acc, recorder):
+        self.acc = acc
+        self.recorder = recorder
+
+    def getRoll(self):
+        roll = self.acc.getRoll()
+        self.recorder.writeValue(LOG_ROLL, roll)
+        return roll
+
+    def getPitch(self):
+        pitch = self.acc.getPitch()
+        self.recorder.writeValue(LOG_PITCH, pitch)
+        return pitch
+
+class RecordingButton():
+    def __init__(self, button, recorder):
+        self.button = button
+        self.recorder = recorder
+
+    def isPressed(self):
+        pressed = self.button.isPressed()
+        self.recorder.writeTag(LOG_PRESSED if pressed else LOG_RELEASED)
+        return pressed
+
+# records the sensors of another driver, a tick ends with every sleep
+class RecordingDriver():
+    def __init__(self, driver, path, seedValue = None):
+        self.driver = driver
+        if seedValue is None:
+            seedValue = randrange(1 << 30)
+        seed(seedValue)
+        self.recorder = SessionRecorder(path, seedValue)
+
+    def __getattr__(self, name):
+        # display and logging go to the recorded driver
+        return getattr(self.driver, name)
+
+    # records the values the game consumes from the recorded driver's sensors
+    def getSensors(self, threshold):
+        sensors = self.driver.getSensors(threshold)
+        return SensorService(RecordingAccelerometer(sensors, self.recorder), RecordingButton(sensors, self.recorder), threshold)
+
+    def sleep(self, seconds):
+        self.recorder.writeTag(LOG_TICK)
+        self.driver.sleep(seconds)
+
+    def close(self):
+        self.recorder.close()
+        self.driver.close()
 
 # classes
 class Oxocard():
-    def __init__(self, accelerometerThreshold):
+    __slots__ = ("threshold", "driver", "sensors", "acc", "R1", "orientation")
+
+    def __init__(self, accelerometerThreshold, driver = None):
         self.threshold = accelerometerThreshold
-        self.acc = Accelerometer.create()
-        self.R1 = Button(BUTTON_R1)
+        self.driver = driver or getDriver()
+        # sensors of the driver, read without blocking
+        self.sensors = self.driver.getSensors(accelerometerThreshold)
+        self.acc = self.sensors
+        self.R1 = self.sensors
         self.orientation = Orientation.NONE
 
     def update(self):
         self.orientation = self.getOrientation()
 
     def getOrientation(self):
-        orientation = Orientation.NONE
-        # west < 0 < east
-        roll = self.acc.getRoll()
-        rollAbs = abs(roll)
-        # north < 0 < south
-        pitch = self.acc.getPitch()
-        pitchAbs = abs(pitch)
-        # check west/east
-        if rollAbs > pitchAbs and rollAbs > self.threshold:
-            if roll < 0:
-                orientation = Orientation.WEST
-            else:
-                orientation = Orientation.EAST
-        # check north/south
-        elif pitchAbs > rollAbs and pitchAbs > self.threshold:
-            if pitch < 0:
-                orientation = Orientation.NORTH
-            else:
-                orientation = Orientation.SOUTH
-
-        return orientation
+        return self.sensors.getOrientation()
 
     def getDifference(self, one, two):
         diff = Difference.SAME
@@ -150,20 +653,32 @@ class Oxocard():
         return degSwitcher.get(phi, Orientation.NONE)
 
 class Color():
-
-    def __init__(self):
-        # indices
-        self.R = 0
-        self.G = 1
-        self.B = 2
+    __slots__ = ()
+    # indices
+    R = 0
+    G = 1
+    B = 2
 
     def getRgbArray(self, h):
         return [
-            int(str(hex(h))[2:4], 16),
-            int(str(hex(h))[4:6], 16),
-            int(str(hex(h))[6:9], 16)
+            (h >> 16) & 0xff,
+            (h >> 8) & 0xff,
+            h & 0xff
         ]
 
+    def getHex(self, rgb):
+        return (rgb[self.R] << 16) | (rgb[self.G] << 8) | rgb[self.B]
+
+    # steps + 1 colors from start to target, integer arithmetic only
+    def getGradient(self, start, target, steps):
+        intStart = self.getRgbArray(start)
+        intTarget = self.getRgbArray(target)
+        gradient = array('I')
+        for step in range(steps + 1):
+            rgb = [intStart[c] + int((intTarget[c] - intStart[c]) * step // steps) for c in (self.R, self.G, self.B)]
+            gradient.append(self.getHex(rgb))
+        return gradient
+
     def getRgbStepSizes(self, start, target, steps):
         # get rgb values of start and target color
         intStart = self.getRgbArray(start)
@@ -183,15 +698,63 @@ class Color():
             diff[self.B] / steps
         ]
 
+# all colors compiled into integer lookup tables once at startup
+class Palette():
+    def __init__(self):
+        # growth level -> color
+        self.levels = array('I', [
+            COL_BROWN,
+            COL_GROW_01,
+            COL_GROW_02,
+            COL_GROW_03,
+            COL_GROW_04,
+            COL_GROW_05,
+            COL_GROW_06,
+            COL_GROW_07,
+            COL_GROW_08,
+            COL_GROW_09,
+            COL_GROW_10,
+            COL_GROW_11,
+            COL_BEIGE
+        ])
+        # 4 bit dot value -> color, 15 is the hayball
+        self.dots = array('I', self.levels)
+        while len(self.dots) < 15:
+            self.dots.append(COL_BEIGE)
+        self.dots.append(COL_HAYBALL)
+        # (back, front) -> colors per tractor element [BL, FL, BR, FR]
+        self.tracs = {}
+        self.getTracColors(COL_TRAC_MOW_BACK, COL_TRAC_MOW_FRONT)
+        self.getTracColors(COL_TRAC_GATHER_BACK, COL_TRAC_GATHER_FRONT)
+        # (start, target, steps) -> gradient, shared by all fields
+        self.gradients = {}
+
+    def getGradient(self, start, target, steps):
+        key = (start, target, steps)
+        if key not in self.gradients:
+            self.gradients[key] = Color().getGradient(start, target, steps)
+        return self.gradients[key]
+
+    def getTracColors(self, colorBack, colorFront):
+        key = (colorBack, colorFront)
+        if key not in self.tracs:
+            self.tracs[key] = array('I', [colorBack, colorFront, colorBack, colorFront])
+        return self.tracs[key]
+
+PALETTE = Palette()
+
 class Field():
-    def __init__(self, width, height, colorMown, colorGrown):
-        # flags
-        self.MOWN = 0
-        self.MAX_MOWN = 3
-        self.GROWN = 11
-        self.MAX_GROWN = 13
-        self.HAYBALL = 15
+    __slots__ = ("width", "height", "colMown", "colGrown", "dots", "dirty", "dirtyAll", "growing", "standing", "hayballs", "writes", "hayballChecks", "mownNear", "hayballsNear", "gradient", "index")
+    # flags
+    MOWN = 0
+    MAX_MOWN = 3
+    GROWN = 11
+    MAX_GROWN = 13
+    HAYBALL = 15
+    # dots grow by randrange(GROWTH) per tick
+    GROWTH = 3
 
+    def __init__(self, width, height, colorMown, colorGrown):
         self.width = width
         self.height = height
 
@@ -200,260 +763,1376 @@ class Field():
 
         self.dots = []
 
-        self.color = Color()
-        self.colorSteps = self.color.getRgbStepSizes(self.colMown, self.colGrown, self.MAX_GROWN)
+        # dots written since the last frame: index -> value at the last frame
+        self.dirty = {}
+        # too many changes to track -> whole field changed
+        self.dirtyAll = True
+
+        # dot counters, kept up to date by every write
+        # dots below grown
+        self.growing = 0
+        # dots above max mown that are no hayball
+        self.standing = 0
+        # hayball dots
+        self.hayballs = 0
+        # dot writes and hayball checks so far
+        self.writes = 0
+        self.hayballChecks = 0
+        # per dot counts of mown and hayball dots in its 3x3 neighbourhood (itself included)
+        self.mownNear = None
+        self.hayballsNear = None
+        # rectangle counts per dot category (see FieldIndex), None when not indexed
+        self.index = None
+
+        self.gradient = PALETTE.getGradient(self.colMown, self.colGrown, self.MAX_GROWN)
 
         self.reset()
 
     def reset(self):
         # array with width * height times a number between 0 and 3
+        self.dots = []
         for i in range(self.width * self.height):
             self.dots.append(randrange(self.MAX_MOWN))
+        self.dirty = {}
+        self.dirtyAll = True
+        self.recount()
+
+    # set every dot to the same value, e.g. to start a benchmark on a grown field
+    def fill(self, dot):
+        self.dots = [dot] * (self.width * self.height)
+        self.dirty = {}
+        self.dirtyAll = True
+        self.recount()
+
+    # count all dots from scratch
+    def recount(self):
+        self.growing = 0
+        self.standing = 0
+        self.hayballs = 0
+        self.mownNear = self.createCounts()
+        self.hayballsNear = self.createCounts()
+        for i in range(len(self.dots)):
+            dot = self.dots[i]
+            self.countDot(dot, 1)
+            if dot <= self.MAX_MOWN:
+                self.countNear(self.mownNear, i, 1)
+            elif dot == self.HAYBALL:
+                self.countNear(self.hayballsNear, i, 1)
+        if self.index is not None:
+            self.index.rebuild()
+
+    # zeroed neighbourhood counts, one per dot
+    def createCounts(self):
+        return bytearray(len(self.dots))
+
+    # add amount to the counts of all dots around dot i
+    def countNear(self, counts, i, amount):
+        x = i % self.width
+        y = int(i / self.width)
+        for nY in range(max(y - 1, 0), min(y + 2, self.height)):
+            row = nY * self.width
+            for nX in range(max(x - 1, 0), min(x + 2, self.width)):
+                counts[row + nX] = counts[row + nX] + amount
+
+    def getCounters(self):
+        return (self.growing, self.standing, self.hayballs)
+
+    # add amount to the counter of the dot's category
+    def countDot(self, dot, amount):
+        if dot < self.GROWN:
+            self.growing = self.growing + amount
+        if dot == self.HAYBALL:
+            self.hayballs = self.hayballs + amount
+        elif dot > self.MAX_MOWN:
+            self.standing = self.standing + amount
+
+    # write a dot and keep the counters in sync
+    def setDot(self, i, dot):
+        old = self.dots[i]
+        if old != dot:
+            self.countDot(old, -1)
+            self.countDot(dot, 1)
+            # update neighbourhoods when the dot becomes / stops being mown or hayball
+            if (old <= self.MAX_MOWN) != (dot <= self.MAX_MOWN):
+                self.countNear(self.mownNear, i, 1 if dot <= self.MAX_MOWN else -1)
+            if (old == self.HAYBALL) != (dot == self.HAYBALL):
+                self.countNear(self.hayballsNear, i, 1 if dot == self.HAYBALL else -1)
+            self.dots[i] = dot
+            self.writes = self.writes + 1
+            if not self.dirtyAll and i not in self.dirty:
+                self.dirty[i] = old
+            if self.index is not None:
+                self.index.update(i, old, dot)
+
+    # dot i as far as it is known without loading storage, e.g. for the viewport
+    def peekDot(self, i):
+        return self.dots[i]
+
+    # forget changes after they were drawn
+    def clearDirty(self):
+        self.dirty = {}
+        self.dirtyAll = False
 
     def grow(self):
         for i in range(len(self.dots)):
             # grow all dots that are not yet growed
             if self.dots[i] < self.GROWN:
-                self.dots[i] = self.dots[i] + randrange(3)
+                self.setDot(i, self.dots[i] + randrange(self.GROWTH))
         return True
 
     def isGrown(self):
-        for i in range(len(self.dots)):
-            # check if all dots are grown
-            if self.dots[i] < self.GROWN:
-                return False
-        return True
+        # check if all dots are grown
+        return self.growing == 0
 
     def isMown(self):
-        for i in range(len(self.dots)):
-            # check all dots if mowed or hayball
-            if self.dots[i] > self.MAX_MOWN and self.dots[i] != self.HAYBALL:
-                return False
-        return True
+        # check all dots if mowed or hayball
+        return self.standing == 0
 
     def isGathered(self):
-        for i in range(len(self.dots)):
-            # check all dots if mowed (no hayball)
-            if self.dots[i] > self.MAX_MOWN:
-                return False
-        return True
+        # check all dots if mowed (no hayball)
+        return self.standing == 0 and self.hayballs == 0
+
+    # dot becomes a hayball when no hayball and at least 3 mown dots are around it
+    def isHayball(self, i):
+        self.hayballChecks = self.hayballChecks + 1
+        return self.hayballsNear[i] == 0 and self.mownNear[i] >= 3
+
+    # hayball check for many dots at once, e.g. a whole swath, against the current field
+    def areHayballs(self, indices):
+        return [self.isHayball(i) for i in indices]
 
+    # linear color between mown and grown
     def getColorComplex(self, dot):
-        mownInt = self.color.getRgbArray(self.colMown)
+        return self.gradient[dot]
 
-        # calculate target hex values
-        targetHex = [
-            str(hex(int(mownInt[self.color.R] + (self.colorSteps[self.color.R] * dot))))[2:],
-            str(hex(int(mownInt[self.color.G] + (self.colorSteps[self.color.G] * dot))))[2:],
-            str(hex(int(mownInt[self.color.B] + (self.colorSteps[self.color.B] * dot))))[2:]
-        ]
+    def getColor(self, dot):
+        return PALETTE.levels[dot]
 
-        # double hex value if just single symbol
-        for i in (self.color.R, self.color.G, self.color.B):
-            if len(targetHex[i]) < 2:
-                targetHex[i] = targetHex[i] + targetHex[i]
+# dots packed two per byte, even dots in the low and odd dots in the high nibble
+class NibbleDots():
+    def __init__(self, count, data = None):
+        self.count = count
+        self.data = data if data is not None else bytearray(int((count + 1) / 2))
 
-        targetString = "0x" + targetHex[self.color.R] + targetHex[self.color.G] + targetHex[self.color.B]
-        target = hex(int(targetString, 16))
+    def __len__(self):
+        return self.count
 
-        return target
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
 
-    def getColor(self, dot):
-        colors = [
-            COL_BROWN,
-            COL_GROW_01,
-            COL_GROW_02,
-            COL_GROW_03,
-            COL_GROW_04,
-            COL_GROW_05,
-            COL_GROW_06,
-            COL_GROW_07,
-            COL_GROW_08,
-            COL_GROW_09,
-            COL_GROW_10,
-            COL_GROW_11,
-            COL_BEIGE
-        ]
-        return colors[dot]
+    def __getitem__(self, i):
+        return (self.data[i >> 1] >> ((i & 1) << 2)) & 0x0f
+
+    def __setitem__(self, i, value):
+        shift = (i & 1) << 2
+        b = i >> 1
+        self.data[b] = (self.data[b] & (0xf0 >> shift)) | (value << shift)
+
+    def copy(self):
+        return NibbleDots(self.count, bytearray(self.data))
+
+# field with 4 bit dots (0 - HAYBALL), an eighth of a list of ints on micropython
+# and cheap to copy, hash or snapshot
+class PackedField(Field):
+    __slots__ = ("ripe",)
+
+    def reset(self):
+        count = self.width * self.height
+        self.dots = NibbleDots(count)
+        data = self.dots.data
+        # same draws in the same order as the list field
+        for i in range(count):
+            if i & 1:
+                data[i >> 1] = data[i >> 1] | (randrange(self.MAX_MOWN) << 4)
+            else:
+                data[i >> 1] = randrange(self.MAX_MOWN)
+        # bytes whose two dots are both grown, grow skips them
+        self.ripe = bytearray(256)
+        for b in range(256):
+            self.ripe[b] = 1 if (b & 0x0f) >= self.GROWN and (b >> 4) >= self.GROWN else 0
+        self.dirty = {}
+        self.dirtyAll = True
+        self.recount()
+
+    def setDot(self, i, dot):
+        data = self.dots.data
+        shift = (i & 1) << 2
+        b = i >> 1
+        old = (data[b] >> shift) & 0x0f
+        if old != dot:
+            self.countDot(old, -1)
+            self.countDot(dot, 1)
+            # update neighbourhoods when the dot becomes / stops being mown or hayball
+            if (old <= self.MAX_MOWN) != (dot <= self.MAX_MOWN):
+                self.countNear(self.mownNear, i, 1 if dot <= self.MAX_MOWN else -1)
+            if (old == self.HAYBALL) != (dot == self.HAYBALL):
+                self.countNear(self.hayballsNear, i, 1 if dot == self.HAYBALL else -1)
+            data[b] = (data[b] & (0xf0 >> shift)) | (dot << shift)
+            self.writes = self.writes + 1
+            if not self.dirtyAll and i not in self.dirty:
+                self.dirty[i] = old
+            if self.index is not None:
+                self.index.update(i, old, dot)
+
+    # neighbourhood counts go up to 9, so they are packed like the dots
+    def createCounts(self):
+        return NibbleDots(len(self.dots))
+
+    # walk the packed bytes, skipping pairs of grown dots
+    def grow(self):
+        data = self.dots.data
+        ripe = self.ripe
+        count = self.dots.count
+        for b in range(len(data)):
+            value = data[b]
+            if ripe[value]:
+                continue
+            i = b << 1
+            # grow all dots that are not yet growed
+            if (value & 0x0f) < self.GROWN:
+                self.setDot(i, (value & 0x0f) + randrange(self.GROWTH))
+            if i + 1 < count and (value >> 4) < self.GROWN:
+                self.setDot(i + 1, (value >> 4) + randrange(self.GROWTH))
+        return True
+
+    def fill(self, dot):
+        self.dots = NibbleDots(self.width * self.height, bytearray([dot | (dot << 4)]) * len(self.dots.data))
+        self.dirty = {}
+        self.dirtyAll = True
+        self.recount()
+
+    # packed dots as bytes, e.g. to store or compare fields
+    def getSnapshot(self):
+        return bytes(self.dots.data)
+
+    def setSnapshot(self, snapshot):
+        self.dots = NibbleDots(self.width * self.height, bytearray(snapshot))
+        self.dirtyAll = True
+        self.recount()
+
+    def getHash(self):
+        return hash(self.getSnapshot())
+
+# field classes with other flags, (class, flags) -> subclass
+FIELD_VARIANTS = {}
+
+# create field with the given (or configured) implementation
+# flags: other class constants, e.g. {"GROWN": 9}
+def createField(width, height, engine = None, flags = None):
+    engine = engine or FIELD_ENGINE
+    if engine == "array" or engine == "tiled":
+        loadDesktop()
+    engineSwitcher = {
+        "list": Field,
+        "array": ArrayField,
+        "tiled": TiledField,
+        "packed": PackedField
+    }
+    fieldClass = engineSwitcher.get(engine, Field)
+    if flags:
+        key = (fieldClass, tuple(sorted(flags.items())))
+        if key not in FIELD_VARIANTS:
+            constants = dict(flags)
+            constants["__slots__"] = ()
+            FIELD_VARIANTS[key] = type(fieldClass.__name__, (fieldClass,), constants)
+        fieldClass = FIELD_VARIANTS[key]
+    return fieldClass(width, height, COL_FIELD_MOWN, COL_FIELD_GROWN)
+
+# dot categories of the field index, every dot is in exactly one
+CAT_MOWN = 0
+CAT_GROWING = 1
+CAT_GROWN = 2
+CAT_HAYBALL = 3
+CAT_NAMES = ("mown", "growing", "grown", "hayball")
+
+# counts of the dots per category in any rectangle of a field, one 2d fenwick tree per
+# category. field writes keep it up to date, updates and queries take
+# O(log width * log height)
+class FieldIndex():
+    def __init__(self, field):
+        self.field = field
+        self.width = field.width
+        self.height = field.height
+        # dot value -> category
+        self.categories = bytearray(16)
+        for dot in range(16):
+            if dot == field.HAYBALL:
+                self.categories[dot] = CAT_HAYBALL
+            elif dot <= field.MAX_MOWN:
+                self.categories[dot] = CAT_MOWN
+            elif dot < field.GROWN:
+                self.categories[dot] = CAT_GROWING
+            else:
+                self.categories[dot] = CAT_GROWN
+        self.trees = None
+        field.index = self
+        self.rebuild()
+
+    # all trees from the dots in O(width * height)
+    def rebuild(self):
+        stride = self.width + 1
+        self.trees = [array('i', [0]) * (stride * (self.height + 1)) for c in CAT_NAMES]
+        dots = self.field.dots
+        for i in range(self.width * self.height):
+            self.trees[self.categories[dots[i]]][((int(i / self.width) + 1) * stride) + (i % self.width) + 1] = 1
+        for tree in self.trees:
+            # rows, then columns
+            for y in range(1, self.height + 1):
+                row = y * stride
+                for x in range(1, self.width + 1):
+                    parent = x + (x & -x)
+                    if parent <= self.width:
+                        tree[row + parent] = tree[row + parent] + tree[row + x]
+            for y in range(1, self.height + 1):
+                parent = y + (y & -y)
+                if parent <= self.height:
+                    for x in range(1, self.width + 1):
+                        tree[(parent * stride) + x] = tree[(parent * stride) + x] + tree[(y * stride) + x]
+
+    def update(self, i, old, dot):
+        before = self.categories[old]
+        after = self.categories[dot]
+        if before != after:
+            x = i % self.width
+            y = int(i / self.width)
+            self.add(self.trees[before], x, y, -1)
+            self.add(self.trees[after], x, y, 1)
+
+    def add(self, tree, x, y, amount):
+        stride = self.width + 1
+        i = y + 1
+        while i <= self.height:
+            row = i * stride
+            j = x + 1
+            while j <= self.width:
+                tree[row + j] = tree[row + j] + amount
+                j = j + (j & -j)
+            i = i + (i & -i)
+
+    # dots of the tree's category left of x and above y
+    def getPrefix(self, tree, x, y):
+        total = 0
+        stride = self.width + 1
+        i = y
+        while i > 0:
+            row = i * stride
+            j = x
+            while j > 0:
+                total = total + tree[row + j]
+                j = j - (j & -j)
+            i = i - (i & -i)
+        return total
+
+    # dots of a category in the rectangle, cut off at the field edges
+    def count(self, category, x, y, width, height):
+        x2 = max(0, min(x + width, self.width))
+        y2 = max(0, min(y + height, self.height))
+        x = max(0, min(x, self.width))
+        y = max(0, min(y, self.height))
+        tree = self.trees[category]
+        return self.getPrefix(tree, x2, y2) - self.getPrefix(tree, x, y2) - self.getPrefix(tree, x2, y) + self.getPrefix(tree, x, y)
+
+    # counts of all categories in the rectangle, by name
+    def getCounts(self, x, y, width, height):
+        return dict((CAT_NAMES[c], self.count(c, x, y, width, height)) for c in range(len(CAT_NAMES)))
+
+    # hayballs per size x size sub-plot, e.g. once a field is mown
+    def getHarvest(self, size):
+        regions = []
+        best = None
+        for y in range(0, self.height, size):
+            for x in range(0, self.width, size):
+                hayballs = self.count(CAT_HAYBALL, x, y, size, size)
+                regions.append([x, y, hayballs])
+                if best is None or hayballs > best[2]:
+                    best = regions[-1]
+        return {
+            "hayballs": self.count(CAT_HAYBALL, 0, 0, self.width, self.height),
+            "regionSize": size,
+            "regions": regions,
+            "best": best
+        }
+
+# event driven growth: every growing dot has the tick of its next change in a heap, a
+# tick only grows the dots due. waiting for the next non zero randrange(GROWTH) draw
+# samples the same ticks and steps as drawing every tick
+class GrowthScheduler():
+    def __init__(self, field):
+        self.field = field
+        self.tick = 0
+        # [due tick, dot index, step]
+        self.events = []
+
+    # first change of every growing dot, at the start of a grow phase
+    def start(self):
+        self.tick = 0
+        self.events = []
+        field = self.field
+        if field.GROWTH <= 1:
+            return
+        for i in range(len(field.dots)):
+            if field.dots[i] < field.GROWN:
+                self.events.append(self.sample(i))
+        heapq.heapify(self.events)
+
+    # draws until the dot changes: the tick it changes on and by how much
+    def sample(self, i):
+        wait = 1
+        step = randrange(self.field.GROWTH)
+        while step == 0:
+            wait = wait + 1
+            step = randrange(self.field.GROWTH)
+        return (self.tick + wait, i, step)
+
+    # tick of the next change, None when the field is grown
+    def getNextTick(self):
+        if len(self.events) == 0:
+            return None
+        return self.events[0][0]
+
+    # jump to the tick before the next change, returns the ticks skipped
+    def skip(self):
+        nextTick = self.getNextTick()
+        if nextTick is None or nextTick <= self.tick + 1:
+            return 0
+        skipped = nextTick - self.tick - 1
+        self.tick = nextTick - 1
+        return skipped
+
+    def grow(self):
+        self.tick = self.tick + 1
+        field = self.field
+        events = self.events
+        while len(events) > 0 and events[0][0] <= self.tick:
+            due, i, step = heapq.heappop(events)
+            dot = field.dots[i] + step
+            field.setDot(i, dot)
+            if dot < field.GROWN:
+                heapq.heappush(events, self.sample(i))
+        return True
+
+# spatial hash of the tractor elements on the field
+class Occupancy():
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # dot index -> [[tractor, element], ..], only occupied dots are stored
+        self.cells = {}
+        # dot indices entered or left since the last frame
+        self.dirty = set()
+        # dot indices covered by more than one tractor
+        self.crowded = set()
+
+    # dot index or -1 when off the field
+    def getIndex(self, x, y):
+        if x >= 0 and x < self.width and y >= 0 and y < self.height:
+            return (y * self.width) + x
+        return -1
+
+    def place(self, trac):
+        elements = trac.elements
+        for el in range(Tractor.ELEMENTS):
+            i = self.getIndex(elements[el << 1], elements[(el << 1) + 1])
+            if i >= 0:
+                entries = self.cells.get(i)
+                if entries is None:
+                    self.cells[i] = [[trac, el]]
+                else:
+                    entries.append([trac, el])
+                    self.crowded.add(i)
+                self.dirty.add(i)
+
+    def remove(self, trac):
+        elements = trac.elements
+        for el in range(Tractor.ELEMENTS):
+            i = self.getIndex(elements[el << 1], elements[(el << 1) + 1])
+            entries = self.cells.get(i)
+            if entries is not None:
+                for entry in entries:
+                    if entry[0] is trac and entry[1] == el:
+                        entries.remove(entry)
+                        break
+                if len(entries) == 0:
+                    del self.cells[i]
+                elif len(entries) == 1:
+                    self.crowded.discard(i)
+                self.dirty.add(i)
+
+    # [tractor, element] shown on the dot or None
+    def get(self, i):
+        entries = self.cells.get(i)
+        if entries is None:
+            return None
+        return entries[0]
+
+    def getColor(self, i):
+        entries = self.cells.get(i)
+        if entries is None:
+            return None
+        trac, el = entries[0]
+        return trac.colors[el]
+
+    # tractors sharing a dot with the given one
+    def getCollisions(self, trac):
+        others = []
+        for i in self.crowded:
+            entries = self.cells[i]
+            if any(entry[0] is trac for entry in entries):
+                for entry in entries:
+                    if entry[0] is not trac and entry[0] not in others:
+                        others.append(entry[0])
+        return others
+
+    def hasCollisions(self):
+        return len(self.crowded) > 0
+
+    def clearDirty(self):
+        self.dirty = set()
+
+# paints field and tractor, pushing only the dots that changed since the last frame
+class Renderer():
+    def __init__(self, driver, width, height):
+        self.driver = driver
+        self.width = width
+        self.height = height
+        # packed frame, dot index -> color
+        self.frame = array('I', [COL_BLACK]) * (width * height)
+        # paint everything on the next frame
+        self.full = True
+        # frame statistics
+        self.fullFrames = 0
+        self.partialFrames = 0
+
+    def render(self, step, field, occupancy):
+        if step == Step.BYE:
+            self.renderBlack()
+        else:
+            if self.full or field.dirtyAll or len(field.dirty) > FULL_FRAME_RATIO * len(field.dots):
+                self.renderFull(field, occupancy)
+            else:
+                self.renderDirty(field, occupancy)
+            field.clearDirty()
+            occupancy.clearDirty()
+
+    # show the rendered frame
+    def present(self):
+        self.driver.repaint()
+
+    # keep the tractor in view, the whole field is always in view here
+    def follow(self, trac):
+        pass
+
+    # field and tractors into the frame
+    def fillField(self, field, occupancy):
+        colors = PALETTE.dots
+        frame = self.frame
+        dots = field.dots
+        for i in range(len(dots)):
+            frame[i] = colors[dots[i]]
+        for i in occupancy.cells:
+            frame[i] = occupancy.getColor(i)
+
+    def renderFull(self, field, occupancy):
+        frame = self.frame
+        self.fillField(field, occupancy)
+        # paint whole frame
+        self.driver.image(frame, self.width)
+        self.full = False
+        self.fullFrames = self.fullFrames + 1
+
+    def renderDirty(self, field, occupancy):
+        colors = PALETTE.dots
+        frame = self.frame
+        width = self.width
+        # changed dots and dots tractors left or entered
+        changed = set(field.dirty)
+        changed.update(occupancy.dirty)
+        for i in changed:
+            color = occupancy.getColor(i)
+            if color is None:
+                color = colors[field.dots[i]]
+            if frame[i] != color:
+                frame[i] = color
+                self.driver.dot(i % width, int(i / width), color)
+        self.partialFrames = self.partialFrames + 1
+
+    # text frame (bit mask columns) on black or over the field
+    def renderText(self, columns, color, field = None, occupancy = None):
+        frame = self.frame
+        width = self.width
+        if field is None:
+            for i in range(len(frame)):
+                frame[i] = COL_BLACK
+        else:
+            self.fillField(field, occupancy)
+        top = max(0, int((self.height - FONT_HEIGHT) / 2))
+        for x in range(min(width, len(columns))):
+            bits = columns[x]
+            y = top
+            while bits and y < self.height:
+                if bits & 1:
+                    frame[(y * width) + x] = color
+                bits = bits >> 1
+                y = y + 1
+        self.driver.image(frame, width)
+        if field is not None:
+            field.clearDirty()
+            occupancy.clearDirty()
+        # the field view has to be painted in full again
+        self.full = True
+
+    def renderBlack(self):
+        frame = self.frame
+        for i in range(len(frame)):
+            frame[i] = COL_BLACK
+        self.driver.image(frame, self.width)
+        self.full = True
+
+# field at all zoom levels: level k has one block per 2^k x 2^k dots holding the sum of
+# the growth levels of its dots that are no hayball and its number of hayballs.
+# kept up to date from the dots written since the last frame
+class FieldPyramid():
+    def __init__(self, field):
+        self.width = field.width
+        self.height = field.height
+        self.levels = 1
+        while (1 << (self.levels - 1)) < max(self.width, self.height):
+            self.levels = self.levels + 1
+        # level 0 are the dots of the field itself
+        self.field = field
+        self.sums = None
+        self.hayballs = None
+        self.hayball = field.HAYBALL
+
+    # blocks per row / column at level k
+    def getBlocksX(self, k):
+        return ((self.width - 1) >> k) + 1
+
+    def getBlocksY(self, k):
+        return ((self.height - 1) >> k) + 1
+
+    # dots in block b of level k (edge blocks are cut off)
+    def getCells(self, k, b):
+        blocksX = self.getBlocksX(k)
+        x = (b % blocksX) << k
+        y = int(b / blocksX) << k
+        return min(1 << k, self.width - x) * min(1 << k, self.height - y)
+
+    def rebuild(self, field):
+        self.field = field
+        if np is not None and isinstance(field.dots, np.ndarray):
+            self.rebuildArray(field)
+            return
+        size = self.width * self.height
+        self.sums = [None]
+        self.hayballs = [None]
+        for k in range(1, self.levels):
+            blocksX = self.getBlocksX(k)
+            sums = array('I', [0]) * (blocksX * self.getBlocksY(k))
+            hayballs = array('I', [0]) * len(sums)
+            if k == 1:
+                for i in range(size):
+                    b = ((int(i / self.width) >> 1) * blocksX) + ((i % self.width) >> 1)
+                    dot = field.peekDot(i)
+                    if dot == self.hayball:
+                        hayballs[b] = hayballs[b] + 1
+                    else:
+                        sums[b] = sums[b] + dot
+            else:
+                # four blocks of the level below
+                belowX = self.getBlocksX(k - 1)
+                belowSums = self.sums[k - 1]
+                belowHayballs = self.hayballs[k - 1]
+                for c in range(len(belowSums)):
+                    b = ((int(c / belowX) >> 1) * blocksX) + ((c % belowX) >> 1)
+                    sums[b] = sums[b] + belowSums[c]
+                    hayballs[b] = hayballs[b] + belowHayballs[c]
+            self.sums.append(sums)
+            self.hayballs.append(hayballs)
+
+    # same for numpy fields, each level sums 2x2 blocks of the one below
+    def rebuildArray(self, field):
+        dots = field.dots.reshape(self.height, self.width)
+        hayballs = (dots == self.hayball).astype(np.uint32)
+        sums = np.where(dots == self.hayball, 0, dots).astype(np.uint32)
+        self.sums = [None]
+        self.hayballs = [None]
+        for k in range(1, self.levels):
+            sums = self.getBlockSums(sums)
+            hayballs = self.getBlockSums(hayballs)
+            for level, values in ((self.sums, sums), (self.hayballs, hayballs)):
+                packed = array('I')
+                packed.frombytes(values.astype(np.uint32).tobytes())
+                level.append(packed)
+
+    def getBlockSums(self, values):
+        height, width = values.shape
+        padded = np.zeros((height + (height & 1), width + (width & 1)), dtype = np.uint32)
+        padded[:height, :width] = values
+        return padded.reshape(padded.shape[0] >> 1, 2, padded.shape[1] >> 1, 2).sum(axis = (1, 3))
+
+    # take over the dots written since the last frame, the field keeps their old values
+    def sync(self, field):
+        if self.sums is None or self.field is not field or field.dirtyAll:
+            self.rebuild(field)
+            return
+        dots = field.dots
+        for i in field.dirty:
+            old = int(field.dirty[i])
+            dot = int(dots[i])
+            if old != dot:
+                self.update(i, old, dot)
+
+    def update(self, i, old, dot):
+        x = i % self.width
+        y = int(i / self.width)
+        growth = (0 if dot == self.hayball else dot) - (0 if old == self.hayball else old)
+        hayballs = (1 if dot == self.hayball else 0) - (1 if old == self.hayball else 0)
+        for k in range(1, self.levels):
+            b = ((y >> k) * self.getBlocksX(k)) + (x >> k)
+            self.sums[k][b] = self.sums[k][b] + growth
+            self.hayballs[k][b] = self.hayballs[k][b] + hayballs
+
+    # color of a block: hayball when most of its dots are, else its average growth level
+    def getColor(self, k, b):
+        colors = PALETTE.dots
+        if k == 0:
+            return colors[self.field.peekDot(b)]
+        cells = self.getCells(k, b)
+        hayballs = self.hayballs[k][b]
+        if hayballs * 2 >= cells:
+            return colors[self.hayball]
+        level = int((self.sums[k][b] / (cells - hayballs)) + 0.5)
+        return colors[min(level, self.hayball - 1)]
+
+# part of the field on the display at a zoom level, moved to keep a tractor in view
+class Viewport():
+    def __init__(self, width, height, zoom = 0):
+        self.width = width
+        self.height = height
+        self.zoom = zoom
+        # top left block of the current zoom level
+        self.x = 0
+        self.y = 0
+
+    def setZoom(self, zoom, pyramid):
+        self.zoom = max(0, min(zoom, pyramid.levels - 1))
+
+    # center the dot at x / y, without showing more than needed beyond the edges
+    def center(self, x, y, pyramid):
+        k = self.zoom
+        self.x = max(0, min((x >> k) - int(self.width / 2), pyramid.getBlocksX(k) - self.width))
+        self.y = max(0, min((y >> k) - int(self.height / 2), pyramid.getBlocksY(k) - self.height))
+
+# renders a display sized part of a larger field through a viewport, zoomed out views
+# read the pyramid, so a frame costs the same for any field size
+class ViewportRenderer(Renderer):
+    def __init__(self, driver, width, height, zoom = 0):
+        Renderer.__init__(self, driver, width, height)
+        self.viewport = Viewport(width, height, zoom)
+        self.pyramid = None
+        self.target = None
+        # frame being composed for partial updates
+        self.view = array('I', [COL_BLACK]) * (width * height)
+
+    def follow(self, trac):
+        self.target = trac
+
+    def render(self, step, field, occupancy):
+        if step == Step.BYE:
+            self.renderBlack()
+            return
+        if self.full:
+            self.renderFull(field, occupancy)
+        else:
+            self.compose(field, occupancy, self.view)
+            self.renderDirty(field, occupancy)
+        field.clearDirty()
+        occupancy.clearDirty()
+
+    def fillField(self, field, occupancy):
+        self.compose(field, occupancy, self.frame)
+
+    # paint the pixels that changed, the whole frame when most of them did
+    def renderDirty(self, field, occupancy):
+        frame = self.frame
+        view = self.view
+        changed = [i for i in range(len(frame)) if frame[i] != view[i]]
+        if len(changed) > FULL_FRAME_RATIO * len(frame):
+            for i in changed:
+                frame[i] = view[i]
+            self.driver.image(frame, self.width)
+            self.fullFrames = self.fullFrames + 1
+            return
+        for i in changed:
+            frame[i] = view[i]
+            self.driver.dot(i % self.width, int(i / self.width), view[i])
+        self.partialFrames = self.partialFrames + 1
+
+    def compose(self, field, occupancy, frame):
+        if self.pyramid is None or self.pyramid.width != field.width or self.pyramid.height != field.height:
+            self.pyramid = FieldPyramid(field)
+        pyramid = self.pyramid
+        pyramid.sync(field)
+        viewport = self.viewport
+        viewport.setZoom(viewport.zoom, pyramid)
+        k = viewport.zoom
+        if self.target is not None:
+            elements = self.target.elements
+            viewport.center(min(elements[0::2]), min(elements[1::2]), pyramid)
+        blocksX = pyramid.getBlocksX(k)
+        blocksY = pyramid.getBlocksY(k)
+        for py in range(self.height):
+            by = viewport.y + py
+            for px in range(self.width):
+                bx = viewport.x + px
+                if bx < blocksX and by < blocksY:
+                    frame[(py * self.width) + px] = pyramid.getColor(k, (by * blocksX) + bx)
+                else:
+                    frame[(py * self.width) + px] = COL_BLACK
+        # tractors on the pixels of their dots
+        for i in occupancy.cells:
+            px = ((i % field.width) >> k) - viewport.x
+            py = ((int(i / field.width)) >> k) - viewport.y
+            if px >= 0 and px < self.width and py >= 0 and py < self.height:
+                frame[(py * self.width) + px] = occupancy.getColor(i)
+
+# 5x7 glyphs, one hex byte per column, bit 0 at the top
+FONT_HEIGHT = 7
+FONT = {
+    " ": "000000",
+    "!": "005f00",
+    "?": "0201510906",
+    ".": "006060",
+    ":": "003636",
+    "A": "7c1211127c",
+    "B": "7f49494936",
+    "E": "7f49494941",
+    "G": "3e4149497a",
+    "H": "7f0808087f",
+    "M": "7f020c027f",
+    "R": "7f09192946",
+    "T": "01017f0101",
+    "U": "3f4040403f",
+    "W": "3f4038403f",
+    "a": "2054547840",
+    "c": "3844444420",
+    "e": "3854545418",
+    "h": "7f08040478",
+    "i": "00447d4000",
+    "l": "00417f4000",
+    "m": "7c04180478",
+    "o": "3844444438",
+    "r": "7c08040408",
+    "t": "043f444020",
+    "u": "3c4040207c",
+    "v": "1c2040201c",
+    "w": "3c4030403c"
+}
+
+# rasterizes texts once into a strip of bit mask columns, frame k of a text is the
+# width columns starting at column k. glyphs and texts are cached
+class TextScroller():
+    def __init__(self, width):
+        self.width = width
+        self.glyphs = {}
+        self.texts = {}
+
+    # glyph columns of a character, unknown characters show as ?
+    def getGlyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = bytes.fromhex(FONT.get(char, FONT["?"]))
+            self.glyphs[char] = glyph
+        return glyph
+
+    # frames scrolling the text in from the right until it left on the left
+    def getFrames(self, text):
+        frames = self.texts.get(text)
+        if frames is None:
+            strip = bytearray(self.width)
+            for char in text:
+                strip.extend(self.getGlyph(char))
+                strip.append(0)
+            strip.extend(bytearray(self.width))
+            view = memoryview(bytes(strip))
+            frames = [view[k:k + self.width] for k in range(len(strip) - self.width + 1)]
+            self.texts[text] = frames
+        return frames
+
+# profiled phases of a tick
+PROF_SENSORS = 0
+PROF_GROW = 1
+PROF_TRACTORS = 2
+PROF_RUN_OVER = 3
+PROF_RENDER = 4
+PROF_REPAINT = 5
+PROF_NEXT_STEP = 6
+PROF_PHASES = ("sensors", "grow", "tractors", "runOver", "render", "repaint", "nextStep")
+
+# times the phases of the last ticks into a fixed size ring buffer
+# callback(summary) and / or a json file get a summary every exportEvery ticks
+class Profiler():
+    def __init__(self, capacity = 1024, callback = None, path = None, exportEvery = 0):
+        self.capacity = capacity
+        self.callback = callback
+        self.path = path
+        self.exportEvery = exportEvery
+        phases = len(PROF_PHASES)
+        # seconds per tick and phase
+        self.times = array('d', [0]) * (capacity * phases)
+        # step, dot writes and hayball checks per tick
+        self.steps = bytearray(capacity)
+        self.writes = array('I', [0]) * capacity
+        self.checks = array('I', [0]) * capacity
+        self.ticks = 0
+        self.slot = 0
+        self.last = 0
+        self.fieldWrites = 0
+        self.fieldChecks = 0
+
+    def start(self, step, field):
+        self.slot = self.ticks % self.capacity
+        base = self.slot * len(PROF_PHASES)
+        for p in range(len(PROF_PHASES)):
+            self.times[base + p] = 0
+        self.steps[self.slot] = step
+        self.fieldWrites = field.writes
+        self.fieldChecks = field.hayballChecks
+        self.last = monotonic()
+
+    # time since the last mark goes to the phase
+    def mark(self, phase):
+        now = monotonic()
+        self.times[(self.slot * len(PROF_PHASES)) + phase] += now - self.last
+        self.last = now
+
+    def stop(self, field):
+        self.writes[self.slot] = field.writes - self.fieldWrites
+        self.checks[self.slot] = field.hayballChecks - self.fieldChecks
+        self.ticks = self.ticks + 1
+        if self.exportEvery > 0 and self.ticks % self.exportEvery == 0:
+            self.export()
+
+    # percentiles of the recorded values
+    def getStats(self, values):
+        if len(values) == 0:
+            return None
+        values = sorted(values)
+        last = len(values) - 1
+        return {
+            "mean": sum(values) / len(values),
+            "p50": values[int(last * 0.5)],
+            "p90": values[int(last * 0.9)],
+            "p99": values[int(last * 0.99)],
+            "max": values[last]
+        }
+
+    # microseconds per phase, overall and per step, plus writes / checks per tick
+    def getSummary(self):
+        count = min(self.ticks, self.capacity)
+        phases = len(PROF_PHASES)
+        summary = {"ticks": self.ticks, "phases": {}, "steps": {}}
+        for p in range(phases):
+            summary["phases"][PROF_PHASES[p]] = self.getStats([self.times[(t * phases) + p] * 1000000 for t in range(count)])
+        for step in set(self.steps[t] for t in range(count)):
+            slots = [t for t in range(count) if self.steps[t] == step]
+            stepSummary = {}
+            for p in range(phases):
+                stepSummary[PROF_PHASES[p]] = self.getStats([self.times[(t * phases) + p] * 1000000 for t in slots])
+            stepSummary["writes"] = self.getStats([self.writes[t] for t in slots])
+            stepSummary["hayballChecks"] = self.getStats([self.checks[t] for t in slots])
+            summary["steps"][Step.string[step]] = stepSummary
+        return summary
+
+    def export(self):
+        summary = self.getSummary()
+        if self.callback is not None:
+            self.callback(summary)
+        if self.path is not None:
+            import json
+            with open(self.path, "w") as f:
+                json.dump(summary, f)
+        return summary
+
+# runs ticks against absolute deadlines, so the time spent working is taken off the
+# sleep. renders every renderEvery-th tick and stretches the period while idle
+class Scheduler():
+    def __init__(self, driver, intervall, renderIntervall = None, idleIntervall = None):
+        self.driver = driver
+        self.intervall = intervall
+        self.renderEvery = 1
+        if renderIntervall and intervall > 0:
+            self.renderEvery = max(1, int(round(renderIntervall / intervall)))
+        self.idleIntervall = max(idleIntervall or intervall, intervall)
+        # current tick period
+        self.period = intervall
+        # False -> leave the sleep to the caller (see AsyncGame), delay holds its length
+        self.blocking = True
+        self.delay = 0
+        self.deadline = None
+        # called with the deadline before a blocking tick sleep, e.g. to draw in between
+        self.filler = None
+        self.ticks = 0
+        self.idleTicks = 0
+        # overrun statistics (seconds a tick finished after its deadline)
+        self.overrun = 0
+        self.overruns = 0
+        self.maxOverrun = 0
+        self.totalOverrun = 0
+
+    def isRenderDue(self):
+        return self.ticks % self.renderEvery == 0
+
+    # end the tick, idle ticks double the period up to the idle intervall
+    def wait(self, idle = False):
+        self.ticks = self.ticks + 1
+        if idle:
+            self.idleTicks = self.idleTicks + 1
+            self.period = min(self.period * 2, self.idleIntervall)
+        else:
+            self.period = self.intervall
+        self.delay = 0
+        # drivers count ticks by their sleeps, so sleep once per tick in any case
+        if self.driver.fastForward or self.period <= 0:
+            self.driver.sleep(0)
+            return
+        now = monotonic()
+        if self.deadline is None:
+            self.deadline = now
+        self.deadline = self.deadline + self.period
+        remaining = self.deadline - now
+        if remaining >= 0:
+            self.overrun = 0
+            if self.blocking:
+                if self.filler:
+                    self.filler(self.deadline)
+                    remaining = max(0, self.deadline - monotonic())
+                self.driver.sleep(remaining)
+            else:
+                self.delay = remaining
+                self.driver.sleep(0)
+        else:
+            self.overrun = -remaining
+            self.overruns = self.overruns + 1
+            self.maxOverrun = max(self.maxOverrun, self.overrun)
+            self.totalOverrun = self.totalOverrun + self.overrun
+            # missed the deadline, start over instead of rushing the next ticks
+            self.deadline = now
+            self.driver.sleep(0)
+
+    def getStats(self):
+        return {
+            "ticks": self.ticks,
+            "idleTicks": self.idleTicks,
+            "period": self.period,
+            "overrun": self.overrun,
+            "overruns": self.overruns,
+            "maxOverrun": self.maxOverrun,
+            "meanOverrun": self.totalOverrun / self.overruns if self.overruns > 0 else 0
+        }
 
 class Bauer():
-    def __init__(self, step, intervall):
+    def __init__(self, step, intervall, driver = None, field = None):
         self.step = step
         self.intervall = intervall
-        self.oxo = Oxocard(accelerometerThreshold)
-        self.field = Field(FIELD_WIDTH, FIELD_HEIGHT, COL_FIELD_MOWN, COL_FIELD_GROWN)
+        self.driver = driver or getDriver()
+        self.oxo = Oxocard(accelerometerThreshold, self.driver)
+        self.field = field or createField(FIELD_WIDTH, FIELD_HEIGHT)
+        self.occupancy = Occupancy(self.field.width, self.field.height)
+        # player tractor first, followed by the fleet
         self.trac = self.getTracMow()
-        self.matrix = [[COL_BLACK for i in range(self.field.width)] for j in range(self.field.height)]
+        self.tracs = [self.trac]
+        if self.field.width > DISPLAY_WIDTH or self.field.height > DISPLAY_HEIGHT:
+            self.renderer = ViewportRenderer(self.driver, DISPLAY_WIDTH, DISPLAY_HEIGHT, VIEW_ZOOM)
+        else:
+            self.renderer = Renderer(self.driver, self.field.width, self.field.height)
+        self.frame = self.renderer.frame
+        # text scrolling through the frames and its next frame
+        self.scroller = TextScroller(self.renderer.width)
+        self.textFrames = None
+        self.textFrame = 0
+        self.scheduler = Scheduler(self.driver, intervall, RENDER_INTERVALL, IDLE_INTERVALL)
+        # per tick timing, None when disabled
+        self.profiler = Profiler() if PROFILE else None
+        # extra ticks before leaving grow, mow and gather
+        self.offsets = [3, 3, 3]
         self.resetOffsets()
-
-    def getTracMow(self):
-        return Tractor(COL_TRAC_MOW_BACK, COL_TRAC_MOW_FRONT, Orientation.EAST, Direction.STRAIGHT, Gear.NEUTRAL)
-
-    def getTracGather(self):
-        return Tractor(COL_TRAC_GATHER_BACK, COL_TRAC_GATHER_FRONT, Orientation.EAST, Direction.STRAIGHT, Gear.NEUTRAL)
+        # completed grow -> mow -> gather cycles
+        self.seasons = 0
+        # set by AsyncGame: button state from the sensor task (None -> poll it here),
+        # queue for texts to scroll (None -> scroll right away) and whether ticks draw
+        self.pressed = None
+        self.texts = None
+        self.rendering = True
+        self.farewell = False
+        # texts waiting for the one scrolling and when that one started
+        self.textQueue = []
+        self.textStarted = 0
+        # a blocking tick sleep keeps the text scrolling
+        self.scheduler.filler = self.scrollUntil
+        # sends the state to mirror displays (see StatePublisher), None when not streaming
+        self.publisher = None
+        # growth events, None -> Field.grow every tick
+        self.growth = GrowthScheduler(self.field) if GROWTH_EVENTS else None
+        # ticks the last update skipped over, count them as played
+        self.skipped = 0
+        if self.step == Step.GROW:
+            self.startGrowth()
+        if FIELD_INDEX and self.field.index is None:
+            FieldIndex(self.field)
+        # hayballs per sub-plot of every mown field, with the season
+        self.harvests = []
+
+    def getTracMow(self, driver = None):
+        return Tractor(COL_TRAC_MOW_BACK, COL_TRAC_MOW_FRONT, Orientation.EAST, Direction.STRAIGHT, Gear.NEUTRAL, driver or self.driver, self.occupancy, Step.MOW)
+
+    def getTracGather(self, driver = None):
+        return Tractor(COL_TRAC_GATHER_BACK, COL_TRAC_GATHER_FRONT, Orientation.EAST, Direction.STRAIGHT, Gear.NEUTRAL, driver or self.driver, self.occupancy, Step.GATHER)
+
+    # replace the player tractor
+    def setTrac(self, trac):
+        self.removeTractor(self.trac)
+        self.trac = trac
+        self.tracs.insert(0, trac)
+
+    # add a fleet tractor, e.g. bauer.addTractor(bauer.getTracGather(driver))
+    def addTractor(self, trac):
+        self.tracs.append(trac)
+
+    def removeTractor(self, trac):
+        self.occupancy.remove(trac)
+        self.tracs.remove(trac)
 
     def resetOffsets(self):
-        self.offsetIsGrown = 3
-        self.offsetIsMown = 3
-        self.offsetIsGathered = 3
+        self.offsetIsGrown = self.offsets[0]
+        self.offsetIsMown = self.offsets[1]
+        self.offsetIsGathered = self.offsets[2]
 
     def update(self):
-        print("step: " + Step.string[self.step])
-
-        if self.oxo.R1.isPressed():
+        self.driver.log("step: " + Step.string[self.step])
+        counters = self.field.getCounters()
+        prof = self.profiler
+        if prof:
+            prof.start(self.step, self.field)
+
+        self.skipped = 0
+        pressed = self.pressed
+        if pressed is None:
+            pressed = self.oxo.R1.isPressed()
+        if prof:
+            prof.mark(PROF_SENSORS)
+        if pressed:
             self.step = Step.BYE
         elif self.step == Step.GROW:
-            self.field.grow()
-        elif self.step == Step.MOW or self.step == Step.GATHER:
-            # stage tractor
-            if self.trac.staging:
-                self.trac.stage()
+            if self.growth:
+                # nothing else happens while growing, skip to the next change
+                if self.driver.fastForward:
+                    self.skipped = self.growth.skip()
+                self.growth.grow()
             else:
-                self.trac.update()
-
-        self.draw()
+                self.field.grow()
+            if prof:
+                prof.mark(PROF_GROW)
+        elif self.step == Step.MOW or self.step == Step.GATHER:
+            for trac in self.tracs:
+                # stage tractor
+                if trac.staging:
+                    trac.stage()
+                else:
+                    trac.updateOxocard()
+                    if prof:
+                        prof.mark(PROF_SENSORS)
+                    trac.drive(trac.oxo.orientation)
+                if prof:
+                    prof.mark(PROF_TRACTORS)
+            self.runOver()
+            if prof:
+                prof.mark(PROF_RUN_OVER)
+
+        if self.publisher:
+            self.publisher.publish(self)
+
+        if self.rendering and (self.step == Step.BYE or self.scheduler.isRenderDue()):
+            self.draw()
 
         self.nextStep()
+        if prof:
+            prof.mark(PROF_NEXT_STEP)
+            prof.stop(self.field)
 
-        sleep(self.intervall)
+        self.scheduler.wait(self.isIdle(counters))
 
     # draw display
     def draw(self):
-        width = self.field.width
-        height = self.field.height
+        prof = self.profiler
+        self.renderer.follow(self.trac)
+        if not self.drawText():
+            self.renderer.render(self.step, self.field, self.occupancy)
+        if prof:
+            prof.mark(PROF_RENDER)
+        self.renderer.present()
+        if prof:
+            prof.mark(PROF_REPAINT)
+
+    # draw the text frame due now, False when no text is scrolling
+    def drawText(self):
+        if self.textFrames is None:
+            return False
+        frame = self.textFrame
+        if not self.driver.fastForward:
+            # by the clock only, however often frames are drawn
+            frame = int((monotonic() - self.textStarted) * TEXT_RATE)
+        if frame >= len(self.textFrames):
+            self.nextText()
+            if self.textFrames is None:
+                return False
+            frame = 0
+        if TEXT_OVERLAY:
+            self.renderer.renderText(self.textFrames[frame], COL_TEXT, self.field, self.occupancy)
+        else:
+            self.renderer.renderText(self.textFrames[frame], COL_TEXT)
+        self.textFrame = frame + 1
+        return True
 
-        for i in range(len(self.field.dots)):
-            color = COL_FIELD_MOWN
+    # draw text frames until the tick deadline
+    def scrollUntil(self, deadline):
+        wait = 1 / TEXT_RATE
+        while self.rendering and self.textFrames is not None and monotonic() + wait < deadline:
+            time.sleep(wait)
+            if self.drawText():
+                self.renderer.present()
+
+    # no dot changed its state and no tractor moved during this tick
+    # (mown dots under a standing tractor are rerolled, but stay mown)
+    def isIdle(self, counters):
+        if self.step != Step.MOW and self.step != Step.GATHER:
+            return False
+        if self.field.getCounters() != counters:
+            return False
+        for trac in self.tracs:
+            if trac.staging or trac.gear != Gear.NEUTRAL:
+                return False
+        return True
 
+    # alter dots under the tractors
+    def runOver(self):
+        width = self.field.width
+        step = self.step
+        # same order as a scan over the whole field
+        for i in sorted(self.occupancy.cells):
+            # tractors only work the field in their own phase, fleet mowers stand by
+            # while gathering and the other way round
+            task = None
+            for entry in self.occupancy.cells[i]:
+                if entry[0].task == step:
+                    task = step
+            if task is None:
+                continue
             dot = self.field.dots[i]
-            # flag if dot ist mown
-            ranover = False
             x = i % width
             y = int(i / width)
-            if self.step == Step.BYE:
-                color = COL_BLACK
-            else:
-                # hayball dot
-                if dot == self.field.HAYBALL:
-                    color = COL_HAYBALL
-                # grown / mowed dot
+            # when mowing and field is not hayball
+            if task == Step.MOW and dot != self.field.HAYBALL:
+                # check if field becomes hayball
+                if i >= 9 and self.isHayball(x, y):
+                    dot = self.field.HAYBALL
                 else:
-                    color = self.field.getColor(dot)
-
-                # check if tractor
-                # back left
-                if self.trac.elements[self.trac.iBL][self.trac.iX] == x and self.trac.elements[self.trac.iBL][self.trac.iY] == y:
-                    color = self.trac.colorBack
-                    if self.step == Step.MOW or self.step == Step.GATHER:
-                        ranover = True
-                # front left
-                elif self.trac.elements[self.trac.iFL][self.trac.iX] == x and self.trac.elements[self.trac.iFL][self.trac.iY] == y:
-                    color = self.trac.colorFront
-                    if self.step == Step.MOW or self.step == Step.GATHER:
-                        ranover = True
-                # back right
-                elif self.trac.elements[self.trac.iBR][self.trac.iX] == x and self.trac.elements[self.trac.iBR][self.trac.iY] == y:
-                    color = self.trac.colorBack
-                    if self.step == Step.MOW or self.step == Step.GATHER:
-                        ranover = True
-                # front right
-                elif self.trac.elements[self.trac.iFR][self.trac.iX] == x and self.trac.elements[self.trac.iFR][self.trac.iY] == y:
-                    color = self.trac.colorFront
-                    if self.step == Step.MOW or self.step == Step.GATHER:
-                        ranover = True
-                        
-                
-            # set color
-            self.matrix[y][x] = color
-
-            # check if dot got ranover by tractor
-            if ranover:
-                # when mowing and field is not hayball
-                if self.step == Step.MOW and dot != self.field.HAYBALL:
-                    # check if field becomes hayball
-                    if i >= 9 and self.isHayball(x, y):
-                        dot = self.field.HAYBALL
-                    else:
-                        # mowed field
-                        dot = randrange(self.field.MAX_MOWN)
-                # when gathering and field is hayball
-                elif self.step == Step.GATHER and dot == self.field.HAYBALL:
                     # mowed field
                     dot = randrange(self.field.MAX_MOWN)
+            # when gathering and field is hayball
+            elif task == Step.GATHER and dot == self.field.HAYBALL:
+                # mowed field
+                dot = randrange(self.field.MAX_MOWN)
 
-            self.field.dots[i] = dot
-
-
-        # paint whole matrix
-        image(self.matrix)
-        repaint()
+            self.field.setDot(i, dot)
 
     def isHayball(self, x, y):
-        hayball = False
-        # counter for mowed neighbours
-        counter = 0
-        # verify hayball
-        # [x-1/y-1][x+0/y-1][x+1/y-1]
-        # [x-1/y-0][x+0/y+0][x+1/y+0]
-        # [x-1/y+1][x+0/y+1][x+1/y+1]
-        for iY in range(-1, 2):
-            for iX in range(-1, 2):
-                factorY = y+iY
-                factorX = x+iX
-                if factorX >= 0 and factorX < self.field.width and factorY >= 0 and factorY < self.field.height:
-                    i = (factorY * self.field.width) + (factorX)
-                    if i >= 0 and i < self.field.width * self.field.height:
-                        # there must not by any hayball in the sourrounding dots
-                        if self.field.dots[i] == self.field.HAYBALL:
-                            return False
-                        # count sourrounding mowed dots
-                        elif self.field.dots[i] <= self.field.MAX_MOWN:
-                            counter = counter + 1
-                        # if 3 sourrounding dots are mowed -> is hayball (if no hayball is in sourroundings)
-                        if counter == 3:
-                            hayball = True
-        return hayball
+        return self.field.isHayball((y * self.field.width) + x)
 
     def nextStep(self):
         # welcome
-        if bauer.step == Step.HELLO:
+        if self.step == Step.HELLO:
             self.step = Step.GROW
+            self.startGrowth()
         # grow field
-        elif bauer.step == Step.GROW:
+        elif self.step == Step.GROW:
             if self.field.isGrown():
                 if self.offsetIsGrown > 0:
                     self.offsetIsGrown = self.offsetIsGrown - 1
                 else:
                     self.step = Step.MOW
-                    bigTextScroll("Mow!")
+                    self.showText("Mow!")
                     self.trac.reset()
         # mow field
-        elif bauer.step == Step.MOW:
+        elif self.step == Step.MOW:
             if self.field.isMown():
                 if self.offsetIsMown > 0:
                     self.offsetIsMown = self.offsetIsMown - 1
                 else:
                     self.step = Step.GATHER
-                    bigTextScroll("Gather!")
-                    self.trac = self.getTracGather()
+                    self.showText("Gather!")
+                    if self.field.index is not None:
+                        harvest = self.field.index.getHarvest(HARVEST_REGION)
+                        harvest["season"] = self.seasons
+                        self.harvests.append(harvest)
+                    self.setTrac(self.getTracGather())
         # gather hay balls
-        elif bauer.step == Step.GATHER:
+        elif self.step == Step.GATHER:
             if self.field.isGathered():
                 if self.offsetIsGathered > 0:
                     self.offsetIsGathered = self.offsetIsGathered - 1
                 else:
                     self.step = Step.GROW
-                    bigTextScroll("Grow..")
+                    self.showText("Grow..")
                     self.trac.reset(False)
-                    self.trac = self.getTracMow()
+                    self.setTrac(self.getTracMow())
                     self.resetOffsets()
+                    self.startGrowth()
+                    self.seasons = self.seasons + 1
+
+    def startGrowth(self):
+        if self.growth:
+            self.growth.start()
+
+    # scroll a text, the next frame repaints everything it covered
+    def showText(self, text):
+        if TEXT_FRAMES:
+            # texts scroll one after the other
+            if self.textFrames is None:
+                self.startText(text)
+            else:
+                self.textQueue.append(text)
+        elif self.texts is None:
+            self.driver.bigTextScroll(text)
+        else:
+            self.texts.append(text)
+        self.renderer.full = True
+
+    def startText(self, text):
+        self.textFrames = self.scroller.getFrames(text)
+        self.textFrame = 0
+        self.textStarted = monotonic()
+
+    def nextText(self):
+        if len(self.textQueue) > 0:
+            self.startText(self.textQueue.pop(0))
+        else:
+            self.textFrames = None
+        self.renderer.full = True
 
     def hello(self):
-        bigTextScroll("Welcome to: THE BAUER")
+        self.showText("Welcome to: THE BAUER")
         self.update()
 
     def bye(self):
-        bigTextScroll("Au revoir!")
+        if not self.farewell:
+            self.farewell = True
+            # the farewell goes before the texts still to scroll
+            self.textFrames = None
+            self.textQueue = []
+            self.showText("Au revoir!")
         self.update()
 
     def grow(self):
@@ -465,24 +2144,137 @@ class Bauer():
     def gather(self):
         self.update()
 
+    # run one pass of the game loop, returns False once the game ended
+    def play(self):
+        # welcome
+        if self.step == Step.HELLO:
+            self.hello()
+        # grow field
+        elif self.step == Step.GROW:
+            self.grow()
+        # mow field
+        elif self.step == Step.MOW:
+            self.mow()
+        # gather hay balls
+        elif self.step == Step.GATHER:
+            self.gather()
+        # exit, once the farewell scrolled by
+        elif self.step == Step.BYE:
+            self.bye()
+            return self.textFrames is not None
+        return True
+
+# runs a game as asyncio tasks: the sensor task polls the button, the simulation task
+# plays the ticks and the render task draws frames and scrolls texts on a thread, so
+# neither a scroll nor a tick sleep holds up the others. a press ends the game at once
+class AsyncGame():
+    def __init__(self, bauer, sensorIntervall = None, renderIntervall = None):
+        self.bauer = bauer
+        self.sensorIntervall = sensorIntervall or (1 / SENSOR_RATE if SENSOR_RATE > 0 else bauer.intervall)
+        self.renderIntervall = renderIntervall or RENDER_INTERVALL
+        self.running = False
+        self.scrolling = False
+        self.wake = None
+        # a recorded session reads the button once per tick like the game loop, so it
+        # replays without the async tasks (a press ends the game on the next tick)
+        self.polling = not isinstance(bauer.driver, RecordingDriver)
+        if self.polling:
+            bauer.pressed = False
+        bauer.texts = []
+        bauer.rendering = False
+        bauer.scheduler.blocking = False
+
+    def run(self):
+        loadAsyncio()
+        asyncio.run(self.main())
+
+    async def main(self):
+        self.running = True
+        self.wake = asyncio.Event()
+        sensing = asyncio.create_task(self.sense())
+        rendering = asyncio.create_task(self.render())
+        await self.simulate()
+        await sensing
+        await rendering
+
+    # waits up to seconds, returns early when woken
+    async def pause(self, seconds):
+        if seconds <= 0 or self.bauer.driver.fastForward:
+            await asyncio.sleep(0)
+            return
+        try:
+            await asyncio.wait_for(self.wake.wait(), seconds)
+            # every waiter is woken by now, later pauses sleep again
+            self.wake.clear()
+        except asyncio.TimeoutError:
+            pass
+
+    async def sense(self):
+        while self.polling and self.running:
+            if self.bauer.oxo.R1.isPressed():
+                self.bauer.pressed = True
+                # cut the tick sleep short
+                self.wake.set()
+                return
+            await self.pause(self.sensorIntervall)
+
+    async def simulate(self):
+        while self.bauer.play():
+            await self.pause(self.bauer.scheduler.delay)
+        self.running = False
+        self.wake.set()
+
+    async def render(self):
+        bauer = self.bauer
+        while self.running or len(bauer.texts) > 0 or self.scrolling:
+            # the scroll owns the display until it is done
+            if not self.scrolling:
+                if len(bauer.texts) > 0:
+                    self.scrolling = True
+                    _thread.start_new_thread(self.scroll, (bauer.texts.pop(0),))
+                else:
+                    bauer.draw()
+            # text frames come at the text rate
+            if bauer.textFrames is not None:
+                await self.pause(min(self.renderIntervall, 1 / TEXT_RATE))
+            else:
+                await self.pause(self.renderIntervall)
+        bauer.draw()
+
+    def scroll(self, text):
+        self.bauer.driver.bigTextScroll(text)
+        self.scrolling = False
+
 class Tractor():
-    def __init__(self, colorBack, colorFront, orientation, direction, gear):
-        # axis indices
-        # [X, Y]
-        self.iX = 0
-        self.iY = 1
-        # element indices
-        # [BL][FL] -->
-        # [BR][FR] -->
-        self.iBL = 0
-        self.iFL = 1
-        self.iBR = 2
-        self.iFR = 3
-        # elements
-        self.elements = []
+    __slots__ = ("elements", "colorBack", "colorFront", "colors", "task", "occupancy", "difference", "gear", "invert", "orientation", "direction", "oxo", "staging")
+    # axis indices
+    # [X, Y]
+    iX = 0
+    iY = 1
+    # element indices
+    # [BL][FL] -->
+    # [BR][FR] -->
+    iBL = 0
+    iFL = 1
+    iBR = 2
+    iFR = 3
+    ELEMENTS = 4
+    # element order after turning: new element k is old element TURN_*[k]
+    TURN_LEFT = (iBR, iBL, iFR, iFL)
+    TURN_RIGHT = (iFL, iFR, iBL, iBR)
+
+    def __init__(self, colorBack, colorFront, orientation, direction, gear, driver = None, occupancy = None, task = Step.MOW):
+        # elements, packed x / y pairs: [x BL, y BL, x FL, y FL, ..]
+        self.elements = array('h', [0]) * (2 * self.ELEMENTS)
         # colors
         self.colorBack = colorBack
         self.colorFront = colorFront
+        # per element color
+        self.colors = PALETTE.getTracColors(colorBack, colorFront)
+        # what running over a dot does (mow or gather)
+        self.task = task
+        # field index of tractor elements
+        self.occupancy = occupancy
 
         # difference between orientation of tractor and orientation of oxocard
         self.difference = Difference.SAME
@@ -494,29 +2286,47 @@ class Tractor():
         # direction of travel (forward, right, left)
         self.direction = direction
 
-        self.oxo = Oxocard(accelerometerThreshold)
+        self.oxo = Oxocard(accelerometerThreshold, driver)
 
         self.staging = True
         self.reset()
 
     def reset(self, staging = True):
-        self.elements = [[-3, 0], [-2, 0], [-3, 1], [-2, 1]]
+        self.leave()
+        self.elements = array('h', [-3, 0, -2, 0, -3, 1, -2, 1])
+        self.enter()
         self.staging = staging
         # self.elements = [[0, 0], [1, 0], [0, 1], [1, 1]]
 
     # drive onto field
     def stage(self):
-        if self.elements[self.iBL][self.iX] <= 0:
+        if self.getX(self.iBL) <= 0:
             self.moveElements(Orientation.EAST, 1)
         else:
             self.staging = False
 
     def update(self):
         self.updateOxocard()
-        self.updateDifference()
-        self.updateGear()
-        self.updateDirection()
-        self.updateElements()
+        self.drive(self.oxo.orientation)
+
+    # advance one tick with the compiled transition table
+    # (same result as updateDifference, updateGear, updateDirection and updateElements)
+    def drive(self, orientOxo):
+        table = KINEMATICS or loadKinematics()
+        base = getKinematicsIndex(self.orientation, orientOxo, self.gear, self.direction, self.invert)
+        self.orientation = table[base + K_ORIENTATION]
+        self.gear = table[base + K_GEAR]
+        self.direction = table[base + K_DIRECTION]
+        self.invert = table[base + K_INVERT] == 1
+        self.difference = table[base + K_DIFFERENCE]
+        rotation = table[base + K_ROTATION]
+        if rotation == Direction.LEFT:
+            self.goLeft()
+        elif rotation == Direction.RIGHT:
+            self.goRight()
+        move = table[base + K_MOVE]
+        if move != Orientation.NONE:
+            self.moveElements(move, 1)
 
     def updateOxocard(self):
         self.oxo.update()
@@ -593,61 +2403,174 @@ class Tractor():
                 self.orientation = move
                 self.invert = True
 
+    # take elements out of the occupancy index before they change
+    def leave(self):
+        if self.occupancy is not None:
+            self.occupancy.remove(self)
+
+    def enter(self):
+        if self.occupancy is not None:
+            self.occupancy.place(self)
+
+    def getX(self, el):
+        return self.elements[(el << 1) + self.iX]
+
+    def getY(self, el):
+        return self.elements[(el << 1) + self.iY]
+
     def goLeft(self):
-        elBL = self.elements[self.iBR]
-        elFL = self.elements[self.iBL]
-        elBR = self.elements[self.iFR]
-        elFR = self.elements[self.iFL]
-        self.elements[self.iBL] = elBL
-        self.elements[self.iFL] = elFL
-        self.elements[self.iBR] = elBR
-        self.elements[self.iFR] = elFR
+        self.turn(self.TURN_LEFT)
 
     def goRight(self):
-        elBL = self.elements[self.iFL]
-        elFL = self.elements[self.iFR]
-        elBR = self.elements[self.iBL]
-        elFR = self.elements[self.iBR]
-        self.elements[self.iBL] = elBL
-        self.elements[self.iFL] = elFL
-        self.elements[self.iBR] = elBR
-        self.elements[self.iFR] = elFR
+        self.turn(self.TURN_RIGHT)
 
+    def turn(self, order):
+        self.leave()
+        old = self.elements[:]
+        elements = self.elements
+        for el in range(self.ELEMENTS):
+            elements[el << 1] = old[order[el] << 1]
+            elements[(el << 1) + 1] = old[(order[el] << 1) + 1]
+        self.enter()
 
     def moveElements(self, orient, amount):
-        # define how to alter element values
-        # [x, y]
-        moveSwitcher = {
-            Orientation.NORTH: [0, -amount],
-            Orientation.EAST: [amount, 0],
-            Orientation.SOUTH: [0, amount],
-            Orientation.WEST: [-amount, 0]
-        }
-        movement = moveSwitcher.get(orient, [0, 0])
+        # how to alter element values
+        moveX = MOVE_X[orient] * amount
+        moveY = MOVE_Y[orient] * amount
         # alter each element
-        for el in self.elements:
-            el[self.iX] = el[self.iX] + movement[self.iX]
-            el[self.iY] = el[self.iY] + movement[self.iY]
+        self.leave()
+        elements = self.elements
+        for el in range(0, len(elements), 2):
+            elements[el] = elements[el] + moveX
+            elements[el + 1] = elements[el + 1] + moveY
+        self.enter()
+
+# element offsets per orientation (east, south, west, north, none)
+MOVE_X = (1, 0, -1, 0, 0)
+MOVE_Y = (0, 1, 0, -1, 0)
+
+# tractor that records instead of moving, runs the update steps to compile the kinematics
+class KinematicsProbe(Tractor):
+    def __init__(self, orientation, orientOxo, gear, direction, invert):
+        self.orientation = orientation
+        self.gear = gear
+        self.direction = direction
+        self.invert = invert
+        self.difference = Difference.SAME
+        # oxocard without sensors, only the orientation math is used
+        self.oxo = Oxocard.__new__(Oxocard)
+        self.oxo.orientation = orientOxo
+        self.rotation = Direction.STRAIGHT
+        self.move = Orientation.NONE
+
+    def goLeft(self):
+        self.rotation = Direction.LEFT
+
+    def goRight(self):
+        self.rotation = Direction.RIGHT
 
+    def moveElements(self, orient, amount):
+        self.move = orient
+
+# kinematics table entries:
+# next orientation, gear, direction, invert, difference, footprint rotation, move orientation
+K_ORIENTATION = 0
+K_GEAR = 1
+K_DIRECTION = 2
+K_INVERT = 3
+K_DIFFERENCE = 4
+K_ROTATION = 5
+K_MOVE = 6
+K_STRIDE = 7
+
+# table offset of a state: orientation x oxocard orientation x gear x direction x invert
+def getKinematicsIndex(orientation, orientOxo, gear, direction, invert):
+    return ((((((orientation * 5) + orientOxo) * 3 + gear) * 3 + direction) * 2) + (1 if invert else 0)) * K_STRIDE
+
+def compileKinematics():
+    table = bytearray(5 * 5 * 3 * 3 * 2 * K_STRIDE)
+    for orientation in range(5):
+        for orientOxo in range(5):
+            for gear in range(3):
+                for direction in range(3):
+                    for invert in (False, True):
+                        probe = KinematicsProbe(orientation, orientOxo, gear, direction, invert)
+                        probe.updateDifference()
+                        probe.updateGear()
+                        probe.updateDirection()
+                        probe.updateElements()
+                        base = getKinematicsIndex(orientation, orientOxo, gear, direction, invert)
+                        table[base + K_ORIENTATION] = probe.orientation
+                        table[base + K_GEAR] = probe.gear
+                        table[base + K_DIRECTION] = probe.direction
+                        table[base + K_INVERT] = 1 if probe.invert else 0
+                        table[base + K_DIFFERENCE] = probe.difference
+                        table[base + K_ROTATION] = probe.rotation
+                        table[base + K_MOVE] = probe.move
+    return table
+
+# compiled on the first drive, None -> not compiled yet
+KINEMATICS = None
+
+def loadKinematics():
+    global KINEMATICS
+    if KINEMATICS is None:
+        KINEMATICS = compileKinematics()
+    return KINEMATICS
+
+# advance many tractors in one call
+# orientations: oxocard orientation per tractor, None -> read each tractor's oxocard
+def driveTractors(tracs, orientations = None):
+    for k in range(len(tracs)):
+        trac = tracs[k]
+        if orientations is None:
+            trac.updateOxocard()
+            trac.drive(trac.oxo.orientation)
+        else:
+            trac.drive(orientations[k])
+
+# headless simulation
+# runs the given number of seasons without display and returns the ticks it took
+def simulate(seasons, samples = None, seedValue = None, maxTicks = 1000000):
+    if seedValue is not None:
+        seed(seedValue)
+    if samples is None:
+        samples = getSnakeScript(FIELD_WIDTH, FIELD_HEIGHT)
+    sim = Bauer(Step.HELLO, 0, HeadlessDriver(samples))
+    ticks = 0
+    while sim.seasons < seasons and ticks < maxTicks and sim.play():
+        ticks = ticks + 1 + sim.skipped
+    return ticks
+
+DRIVER = None
+
+def getDriver():
+    global DRIVER
+    if DRIVER is None:
+        if loadDisplay():
+            DRIVER = OxoDriver(FAST_FORWARD)
+        else:
+            DRIVER = HeadlessDriver(getSnakeScript(FIELD_WIDTH, FIELD_HEIGHT), fastForward = FAST_FORWARD, verbose = True)
+        DRIVER.enableRepaint(False)
+    return DRIVER
 
 # game loop
-bauer = Bauer(Step.HELLO, INTERVALL)
-
-running = True
-while (running):
-    # welcome
-    if bauer.step == Step.HELLO:
-        bauer.hello()
-    # grow field
-    elif bauer.step == Step.GROW:
-        bauer.grow()
-    # mow field
-    elif bauer.step == Step.MOW:
-        bauer.mow()
-    # gather hay balls
-    elif bauer.step == Step.GATHER:
-        bauer.gather()
-    # exit
-    elif bauer.step == Step.BYE:
-        bauer.bye()
-        running = False
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len([arg for arg in args if arg in DESKTOP_FLAGS]) > 0:
+        loadDesktop()
+        runDesktop(args)
+    else:
+        driver = getDriver()
+        # python the-bauer.py --record session.log
+        if "--record" in args:
+            driver = RecordingDriver(driver, args[args.index("--record") + 1])
+        bauer = Bauer(Step.HELLO, INTERVALL, driver)
+
+        if "--async" in args and loadAsyncio() is not None:
+            AsyncGame(bauer).run()
+        else:
+            running = True
+            while (running):
+                running = bauer.play()
+        driver.close()